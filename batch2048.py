@@ -0,0 +1,157 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from typing import Optional
+
+# LINES[a, i, j] is the cell index of j-th cell of line i when sliding in
+# direction "LDUR"[a], cell 0 is the one values slide towards
+_idx = np.arange(16).reshape(4, 4)  # [y, x]
+LINES = np.array([
+    _idx,                  # L
+    _idx.T[:, ::-1],       # D
+    _idx.T,                # U
+    _idx[:, ::-1],         # R
+])
+
+_slide_table = None
+_score_table = None
+
+
+def _slide_row(cells):
+    """slide 4 values towards index 0, same as Game2048.slide"""
+    out = []
+    score = 0
+    prev = 0
+    for v in cells:
+        if v > 0:
+            if v == prev:
+                # merged values above 15 don't fit in 4 bits
+                out[-1] = min(v + 1, 15)
+                score += 1 << (v + 1)
+                prev = 0
+            else:
+                out.append(v)
+                prev = v
+    out += [0] * (4 - len(out))
+    return out, score
+
+
+def _tables():
+    """slid row and merge score for each of the 65536 packed rows"""
+    global _slide_table, _score_table
+    if _slide_table is None:
+        slide = np.zeros((1 << 16, 4), dtype=np.uint8)
+        score = np.zeros(1 << 16, dtype=np.int64)
+        for row in range(1 << 16):
+            cells = [(row >> (4*i)) & 0xF for i in range(4)]
+            slide[row], score[row] = _slide_row(cells)
+        _slide_table, _score_table = slide, score
+    return _slide_table, _score_table
+
+
+def slide_grids(grids: np.ndarray, actions: np.ndarray):
+    """
+    Slide each (N,16) grid in direction "LDUR"[actions[n]].
+    Returns new grids and sum of merged tile values for each grid
+    """
+    slide_table, score_table = _tables()
+    n = grids.shape[0]
+    cells = LINES[actions].reshape(n, 16)
+    lines = np.take_along_axis(grids, cells, axis=1).reshape(n, 4, 4)
+    rows = (lines[..., 0].astype(np.intp) | (lines[..., 1] << 4).astype(
+        np.intp) | (lines[..., 2].astype(np.intp) << 8) |
+        (lines[..., 3].astype(np.intp) << 12))
+    out = np.empty_like(grids)
+    np.put_along_axis(out, cells, slide_table[rows].reshape(n, 16), axis=1)
+    return out, score_table[rows].sum(axis=1)
+
+
+class BatchGame2048:
+    """
+    N games of 2048 stepped together with numpy, following Game2048 rules:
+    new tiles are 2 (value 1) 90% of the time and 4 (value 2) otherwise,
+    and a game is over when no cell is open for a new tile after a slide.
+
+    rng is a numpy Generator shared by all games, or a
+    tile_random.TileStreams with a stream per game.  With
+    TileStreams(seeds) game n gets the same tiles as
+    Game2048(rng=TileRandom(seeds[n])) playing the same moves.
+    """
+
+    def __init__(self, n: int, rng=None):
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.grids = np.zeros((n, 16), dtype=np.uint8)
+        self.reset()
+
+    def __len__(self) -> int:
+        return self.grids.shape[0]
+
+    def reset(self, mask: Optional[np.ndarray] = None):
+        """start new games (all games, or where mask is set)"""
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+        self.grids[mask] = 0
+        self.add_tile(mask)
+        self.add_tile(mask)
+
+    def slide(self, actions: np.ndarray,
+              mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """slide games (where mask is set), returns merge scores"""
+        if mask is None:
+            self.grids, score = slide_grids(self.grids, actions)
+            return score
+        score = np.zeros(len(self), dtype=np.int64)
+        self.grids[mask], score[mask] = slide_grids(self.grids[mask],
+                                                    actions[mask])
+        return score
+
+    def add_tile(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Add a new tile to each game (where mask is set).
+        Returns False for games that have no open cell
+        """
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+        idxs = np.flatnonzero(mask)
+        grids = self.grids[idxs]
+        empty = grids == 0
+        count = empty.sum(axis=1)
+        ok = count > 0
+        success = np.zeros(len(self), dtype=bool)
+        success[idxs] = ok
+        idxs = idxs[ok]
+        empty = empty[ok]
+        count = count[ok]
+        if isinstance(self.rng, np.random.Generator):
+            pick_u = self.rng.random(len(idxs))
+            value_u = self.rng.random(len(idxs))
+        else:
+            pick_u, value_u = self.rng.pairs(idxs)
+        pick = (pick_u * count).astype(np.intp)
+        # cell of the pick-th open cell in each grid
+        cell = (np.cumsum(empty, axis=1) > pick[:, None]).argmax(axis=1)
+        self.grids[idxs, cell] = np.where(value_u > 0.9, 2, 1)
+        return success
+
+    def max_value(self) -> np.ndarray:
+        return self.grids.max(axis=1)
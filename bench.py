@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import multiprocessing
+import random
+import subprocess
+import sys
+import time
+from game2048 import Game2048
+
+# modules a worker may need, from lightest to heaviest
+MODULES = ['grid4x4', 'game2048', 'players', 'gym_env', 'grid_batch',
+           'dqn_numpy', 'dqn_train']
+
+
+def import_time(module):
+    """seconds to import module in a fresh interpreter"""
+    code = ("import time; start = time.perf_counter(); "
+            f"import {module}; print(time.perf_counter() - start)")
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout)
+
+
+def engine_moves_per_sec(seconds=1.0):
+    game = Game2048()
+    moves = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(100):
+            game.slide(random.choice("LDUR"))
+            if not game.add_tile():
+                game.reset()
+        moves += 100
+    return moves / (time.perf_counter() - start)
+
+
+def _worker_ready(_):
+    import game2048  # noqa: F401
+    return True
+
+
+def pool_spin_up(method, processes):
+    """seconds until every worker of a new pool has run a task"""
+    context = multiprocessing.get_context(method)
+    start = time.perf_counter()
+    with context.Pool(processes) as pool:
+        pool.map(_worker_ready, range(processes), chunksize=1)
+        elapsed = time.perf_counter() - start
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure import, engine, and process pool start times")
+    parser.add_argument('--processes', type=int,
+                        default=multiprocessing.cpu_count())
+    args = parser.parse_args(argv)
+
+    print("import time (fresh interpreter)")
+    for module in MODULES:
+        seconds = import_time(module)
+        msg = "not installed" if seconds is None else f"{seconds*1000:.1f} ms"
+        print(f"    {module:<20s} {msg}")
+
+    print(f"engine {engine_moves_per_sec():.0f} moves/sec")
+
+    print(f"pool spin-up ({args.processes} processes)")
+    for method in multiprocessing.get_all_start_methods():
+        seconds = pool_spin_up(method, args.processes)
+        print(f"    {method:<20s} {seconds*1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
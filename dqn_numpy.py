@@ -0,0 +1,116 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import numpy as np
+from typing import List, Mapping, Optional, Tuple
+
+# per output row scale for int8 weights, see export_dqn
+_INT8_MAX = 127
+
+
+def _to_numpy(value) -> np.ndarray:
+    if hasattr(value, 'detach'):
+        # torch tensor
+        value = value.detach().cpu().numpy()
+    return np.asarray(value, dtype=np.float32)
+
+
+def export_dqn(model, path: str, observation: str = 'one_hot',
+               quantize: Optional[str] = None):
+    """
+    Save weights of the notebook DQN (layer1, layer2, ... nn.Linear layers
+    with relu between them) to a flat .npz file.
+
+    model is a torch module or its state_dict.  observation names the
+    grid_batch.OBSERVATIONS encoding the network was trained with.
+    quantize is None, 'float16', or 'int8' (symmetric, one scale per output
+    row) to shrink the file.
+    """
+    state = model.state_dict() if hasattr(model, 'state_dict') else model
+    layers = sorted({int(m.group(1)) for m in
+                     (re.match(r'layer(\d+)\.weight$', k) for k in state)
+                     if m is not None})
+    arrays = {'observation': np.array(observation),
+              'quantize': np.array(quantize or 'float32')}
+    for i, n in enumerate(layers):
+        weight = _to_numpy(state[f'layer{n}.weight'])
+        bias = _to_numpy(state[f'layer{n}.bias'])
+        if quantize == 'float16':
+            weight = weight.astype(np.float16)
+        elif quantize == 'int8':
+            scale = np.abs(weight).max(axis=1) / _INT8_MAX
+            scale[scale == 0] = 1.0
+            arrays[f'scale{i}'] = scale.astype(np.float32)
+            weight = np.round(weight / scale[:, None]).astype(np.int8)
+        elif quantize is not None:
+            raise RuntimeError(f"unknown quantize {quantize}")
+        arrays[f'weight{i}'] = weight
+        arrays[f'bias{i}'] = bias
+    np.savez(path, **arrays)
+
+
+class NumpyDQN:
+    """
+    Forward pass of an exported DQN in numpy.
+    Quantized weights are expanded back to float32 when loaded.
+    """
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray]],
+                 observation: str = 'one_hot'):
+        # weights are stored transposed, (n_in, n_out), for obs @ weight
+        self.layers = [(np.ascontiguousarray(w.T, dtype=np.float32),
+                        b.astype(np.float32)) for w, b in layers]
+        self.observation = observation
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyDQN':
+        with np.load(path) as data:
+            layers = []
+            i = 0
+            while f'weight{i}' in data:
+                weight = data[f'weight{i}'].astype(np.float32)
+                if f'scale{i}' in data:
+                    weight *= data[f'scale{i}'][:, None]
+                layers.append((weight, data[f'bias{i}']))
+                i += 1
+            return cls(layers, str(data['observation']))
+
+    @classmethod
+    def from_state_dict(cls, state: Mapping,
+                        observation: str = 'one_hot') -> 'NumpyDQN':
+        layers = []
+        n = 1
+        while f'layer{n}.weight' in state:
+            layers.append((_to_numpy(state[f'layer{n}.weight']),
+                           _to_numpy(state[f'layer{n}.bias'])))
+            n += 1
+        return cls(layers, observation)
+
+    def __call__(self, obs: np.ndarray) -> np.ndarray:
+        """action values for (B, n_obs) or (n_obs,) observations"""
+        x = np.asarray(obs, dtype=np.float32)
+        for i, (weight, bias) in enumerate(self.layers):
+            x = x @ weight + bias
+            if i < len(self.layers) - 1:
+                np.maximum(x, 0, out=x)
+        return x
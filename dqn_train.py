@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Deep-Q training loop from deep_q.ipynb as a script, see
+# doc/deep_q/deep_q.md
+
+import argparse
+import copy
+import json
+import math
+import os
+import queue
+import random
+import threading
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+import torch.nn.functional as F
+import gym_env
+from grid_batch import OBSERVATIONS
+from replay import ReplayBuffer
+from visit_counter import NoveltyBonus
+
+# BATCH_SIZE is the number of transitions sampled from the replay buffer
+# GAMMA is the discount factor
+# EPS_START is the starting value of epsilon
+# EPS_END is the final value of epsilon
+# EPS_DECAY controls the rate of exponential decay of epsilon, higher means
+# a slower decay
+# TAU is the update rate of the target network
+# LR is the learning rate of the AdamW optimizer
+DEFAULT_CONFIG = {
+    'env': 'Environment9',
+    'batch_size': 128,
+    'gamma': 0.99,
+    'eps_start': 0.9,
+    'eps_end': 0.05,
+    'eps_decay': 10000,
+    'tau': 0.005,
+    'lr': 1e-4,
+    'memory': 10000,
+    'hidden': 128,
+    'augment': False,
+    # scale of count-based exploration bonus, 0 disables it
+    'novelty': 0.0,
+    'seed': 0,
+}
+
+
+class DQN(nn.Module):
+
+    def __init__(self, n_observations, n_actions, hidden=128):
+        super(DQN, self).__init__()
+        self.layer1 = nn.Linear(n_observations, hidden)
+        self.layer2 = nn.Linear(hidden, hidden)
+        self.layer3 = nn.Linear(hidden, n_actions)
+
+    def forward(self, x):
+        x = F.relu(self.layer1(x))
+        x = F.relu(self.layer2(x))
+        return self.layer3(x)
+
+
+class Trainer:
+    """
+    Training state of one run: environment, networks, optimizer and replay
+    memory.  Transitions are stored as packed grids and encoded with the
+    environment observation when sampled.  With augment, the environment
+    does not flip grids and sampled transitions get a random symmetry.
+    """
+
+    def __init__(self, config=None, device=None):
+        self.config = dict(DEFAULT_CONFIG)
+        if config is not None:
+            self.config.update(config)
+        cfg = self.config
+        if device is None:
+            device = torch.device("cuda" if torch.cuda.is_available()
+                                  else "cpu")
+        self.device = device
+        random.seed(cfg['seed'])
+        torch.manual_seed(cfg['seed'])
+
+        self.env = getattr(gym_env, cfg['env'])()
+        if cfg['augment']:
+            self.env.canonicalize = False
+        if cfg['novelty'] > 0:
+            self.env.novelty = NoveltyBonus(cfg['novelty'])
+        self.observe = OBSERVATIONS[self.env.observation]
+        state, _ = self.env.reset()
+        n_observations = len(state)
+        n_actions = 4
+
+        self.policy_net = DQN(n_observations, n_actions,
+                              cfg['hidden']).to(device)
+        self.target_net = DQN(n_observations, n_actions,
+                              cfg['hidden']).to(device)
+        self.target_net.load_state_dict(self.policy_net.state_dict())
+        self.optimizer = optim.AdamW(self.policy_net.parameters(),
+                                     lr=cfg['lr'], amsgrad=True)
+        self.memory = ReplayBuffer(cfg['memory'],
+                                   np.random.default_rng(cfg['seed']))
+        self.steps_done = 0
+        self.episode_durations = []
+
+    def select_action(self, state):
+        cfg = self.config
+        sample = random.random()
+        eps_threshold = cfg['eps_end'] + \
+            (cfg['eps_start'] - cfg['eps_end']) * \
+            math.exp(-1. * self.steps_done / cfg['eps_decay'])
+        self.steps_done += 1
+        if sample > eps_threshold:
+            with torch.no_grad():
+                return self.policy_net(state).max(1).indices.item()
+        else:
+            return random.randrange(4)
+
+    def optimize_model(self):
+        cfg = self.config
+        if len(self.memory) < cfg['batch_size']:
+            return
+        batch = self.memory.sample(cfg['batch_size'], augment=cfg['augment'])
+
+        def to_tensor(array, dtype=torch.float32):
+            return torch.as_tensor(array, dtype=dtype, device=self.device)
+
+        state_batch = to_tensor(self.observe(batch['grid']))
+        next_state_batch = to_tensor(self.observe(batch['next_grid']))
+        action_batch = to_tensor(batch['action'], torch.long).unsqueeze(1)
+        reward_batch = to_tensor(batch['reward'])
+        non_final_mask = to_tensor(~batch['done'], torch.bool)
+
+        # Q(s_t, a) for actions taken
+        state_action_values = self.policy_net(state_batch).gather(
+            1, action_batch)
+
+        # V(s_{t+1}) from target net, 0 for final states
+        next_state_values = torch.zeros(cfg['batch_size'], device=self.device)
+        with torch.no_grad():
+            next_state_values[non_final_mask] = self.target_net(
+                next_state_batch[non_final_mask]).max(1).values
+        expected_state_action_values = \
+            (next_state_values * cfg['gamma']) + reward_batch
+
+        criterion = nn.SmoothL1Loss()
+        loss = criterion(state_action_values,
+                         expected_state_action_values.unsqueeze(1))
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        # In-place gradient clipping
+        torch.nn.utils.clip_grad_value_(self.policy_net.parameters(), 100)
+        self.optimizer.step()
+
+    def soft_update(self):
+        # θ′ ← τ θ + (1 −τ )θ′
+        tau = self.config['tau']
+        target_net_state_dict = self.target_net.state_dict()
+        policy_net_state_dict = self.policy_net.state_dict()
+        for key in policy_net_state_dict:
+            target_net_state_dict[key] = policy_net_state_dict[key]*tau + \
+                target_net_state_dict[key]*(1-tau)
+        self.target_net.load_state_dict(target_net_state_dict)
+
+    def run_episode(self):
+        """play and train on one episode, returns its duration"""
+        state, _ = self.env.reset()
+        grid = self.env.game.grid.pack()
+        t = 0
+        while True:
+            state = torch.tensor(state, dtype=torch.float32,
+                                 device=self.device).unsqueeze(0)
+            action = self.select_action(state)
+            state, reward, terminated, truncated, _ = self.env.step(action)
+            next_grid = None if terminated else self.env.game.grid.pack()
+            self.memory.push(grid, action, reward, next_grid)
+            grid = next_grid
+            self.optimize_model()
+            self.soft_update()
+            t += 1
+            if terminated or truncated:
+                break
+        self.episode_durations.append(t)
+        return t
+
+    def state_dict(self):
+        """
+        Copy of everything needed to resume training exactly, taken between
+        episodes.  Replay memory is kept in its packed form.
+        """
+        memory = self.memory
+        env_state = {k: v for k, v in vars(self.env).items()
+                     if k not in ('game', 'action_space', 'observation_space')}
+        return {
+            'config': self.config,
+            'policy_net': {k: v.detach().clone() for k, v in
+                           self.policy_net.state_dict().items()},
+            'target_net': {k: v.detach().clone() for k, v in
+                           self.target_net.state_dict().items()},
+            'optimizer': copy.deepcopy(self.optimizer.state_dict()),
+            'steps_done': self.steps_done,
+            'episode_durations': self.episode_durations[:],
+            'env': copy.deepcopy(env_state),
+            'memory': {
+                'grid': memory.grid.copy(),
+                'action': memory.action.copy(),
+                'reward': memory.reward.copy(),
+                'next_grid': memory.next_grid.copy(),
+                'done': memory.done.copy(),
+                'position': memory.position,
+                'size': memory.size,
+            },
+            'rng': {
+                'python': random.getstate(),
+                'numpy': memory.rng.bit_generator.state,
+                'torch': torch.get_rng_state(),
+            },
+        }
+
+    def load_state_dict(self, state):
+        self.policy_net.load_state_dict(state['policy_net'])
+        self.target_net.load_state_dict(state['target_net'])
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.steps_done = state['steps_done']
+        self.episode_durations = state['episode_durations'][:]
+        vars(self.env).update(state['env'])
+        memory = self.memory
+        for key in ('grid', 'action', 'reward', 'next_grid', 'done'):
+            getattr(memory, key)[:] = state['memory'][key]
+        memory.position = state['memory']['position']
+        memory.size = state['memory']['size']
+        random.setstate(state['rng']['python'])
+        memory.rng.bit_generator.state = state['rng']['numpy']
+        torch.set_rng_state(state['rng']['torch'])
+
+    def train(self, episodes, report_every=100, checkpointer=None,
+              checkpoint_every=100, metrics_file=None, verbose=True):
+        """
+        Train until episodes episodes have been played.  Every report_every
+        episodes the average duration of the last 100 is printed, and
+        written as a json line to optional metrics_file.
+        """
+        while len(self.episode_durations) < episodes:
+            self.run_episode()
+            n = len(self.episode_durations)
+            if n % report_every == 0:
+                avg = sum(self.episode_durations[-100:]) / \
+                    len(self.episode_durations[-100:])
+                if verbose:
+                    print(f"episode {n} avg duration {avg}")
+                if metrics_file is not None:
+                    metrics_file.write(json.dumps({
+                        'episode': n, 'avg_duration': avg,
+                        'steps': self.steps_done, 'time': time.time()}) +
+                        "\n")
+                    metrics_file.flush()
+            if checkpointer is not None and (n % checkpoint_every == 0 or
+                                             n == episodes):
+                checkpointer.save(self.state_dict())
+
+
+def load_checkpoint(path):
+    return torch.load(path, weights_only=False)
+
+
+class Checkpointer:
+    """
+    Writes Trainer.state_dict() snapshots to path on a background thread,
+    so training continues while the previous checkpoint is serialized.
+    Each file is written to a temporary name and renamed over path, so path
+    always holds a complete checkpoint.  save() only blocks when a snapshot
+    is already waiting to be written.
+
+    writes holds (seconds, bytes) for every checkpoint written.
+    """
+
+    def __init__(self, path, verbose=True):
+        self.path = path
+        self.verbose = verbose
+        self.writes = []
+        self._queue = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, state):
+        self._queue.put(state)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run(self):
+        while True:
+            state = self._queue.get()
+            if state is None:
+                return
+            start = time.monotonic()
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                torch.save(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            seconds = time.monotonic() - start
+            size = os.path.getsize(self.path)
+            self.writes.append((seconds, size))
+            if self.verbose:
+                episode = len(state['episode_durations'])
+                print(f"checkpoint episode {episode} : "
+                      f"{size / 1e6:.1f} MB in {seconds*1000:.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train a Deep-Q player")
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--config', default=None,
+                        help="json file overriding DEFAULT_CONFIG")
+    for key, value in DEFAULT_CONFIG.items():
+        if isinstance(value, bool):
+            parser.add_argument(f"--{key.replace('_', '-')}",
+                                action='store_true', default=None)
+        else:
+            parser.add_argument(f"--{key.replace('_', '-')}",
+                                type=type(value), default=None)
+    parser.add_argument('--export', default=None,
+                        help="write trained weights for dqn_numpy to file")
+    parser.add_argument('--checkpoint', default=None,
+                        help="checkpoint file, training resumes from it "
+                        "if it exists")
+    parser.add_argument('--checkpoint-every', type=int, default=100,
+                        help="episodes between checkpoints")
+    parser.add_argument('--metrics', default=None,
+                        help="append json lines of training progress to file")
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.config is not None:
+        with open(args.config) as f:
+            config.update(json.load(f))
+    for key in DEFAULT_CONFIG:
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+
+    state = None
+    if args.checkpoint is not None and os.path.exists(args.checkpoint):
+        state = load_checkpoint(args.checkpoint)
+        # resumed run keeps its original config
+        config = state['config']
+    trainer = Trainer(config)
+    if state is not None:
+        trainer.load_state_dict(state)
+        print(f"resumed from episode {len(trainer.episode_durations)}")
+    checkpointer = None
+    if args.checkpoint is not None:
+        checkpointer = Checkpointer(args.checkpoint)
+    metrics_file = None
+    if args.metrics is not None:
+        metrics_file = open(args.metrics, 'a')
+    start = time.monotonic()
+    try:
+        trainer.train(args.episodes, checkpointer=checkpointer,
+                      checkpoint_every=args.checkpoint_every,
+                      metrics_file=metrics_file)
+    finally:
+        if checkpointer is not None:
+            checkpointer.close()
+        if metrics_file is not None:
+            metrics_file.close()
+    print(f"trained {args.episodes} episodes in "
+          f"{time.monotonic() - start:.0f} sec")
+    if checkpointer is not None and len(checkpointer.writes) > 0:
+        seconds = [s for s, _ in checkpointer.writes]
+        print(f"{len(seconds)} checkpoints, "
+              f"avg {sum(seconds) / len(seconds) * 1000:.0f} ms, "
+              f"{checkpointer.writes[-1][1] / 1e6:.1f} MB")
+    if args.export is not None:
+        from dqn_numpy import export_dqn
+        export_dqn(trainer.policy_net, args.export, trainer.env.observation)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import math
+import multiprocessing
+import random
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from batch2048 import BatchGame2048
+from dqn_numpy import NumpyDQN
+from game2048 import Game2048
+from grid_batch import (OBSERVATIONS, UNFLIP_ACTIONS, flip_grids,
+                        heavy_side_flips)
+from players import PLAYERS, print_results
+
+# (iteration, max value, score) for one game, iteration is counted like
+# the players run() methods
+GameResult = Tuple[int, int, int]
+
+
+def play_policy_games(model: NumpyDQN, games: int, canonicalize: bool = True,
+                      max_iterations: int = 1200, seed: int = 0,
+                      batch_size: int = 4096) -> List[GameResult]:
+    """Greedy games from model, batch_size games are played in lockstep"""
+    rng = np.random.default_rng(seed)
+    observe = OBSERVATIONS[model.observation]
+    results = []
+    for start in range(0, games, batch_size):
+        n = min(batch_size, games - start)
+        batch = BatchGame2048(n, rng)
+        active = np.ones(n, dtype=bool)
+        iterations = np.full(n, max_iterations - 1)
+        scores = np.zeros(n, dtype=np.int64)
+        for iteration in range(max_iterations):
+            idxs = np.flatnonzero(active)
+            if len(idxs) == 0:
+                break
+            grids = batch.grids[idxs]
+            if canonicalize:
+                flips = heavy_side_flips(grids)
+                grids = flip_grids(grids, flips)
+            actions = np.zeros(n, dtype=np.intp)
+            actions[idxs] = np.argmax(model(observe(grids)), axis=1)
+            if canonicalize:
+                actions[idxs] = UNFLIP_ACTIONS[flips, actions[idxs]]
+            scores += batch.slide(actions, active)
+            failed = active & ~batch.add_tile(active)
+            iterations[failed] = iteration
+            active &= ~failed
+        max_values = batch.max_value()
+        results += list(zip(iterations.tolist(), max_values.tolist(),
+                            scores.tolist()))
+    return results
+
+
+def play_player_games(name: str, games: int, seed: int,
+                      max_iterations: int = 1200) -> List[GameResult]:
+    """games with a hand-coded player from players.PLAYERS"""
+    random.seed(seed)
+    game = Game2048()
+    player = PLAYERS[name](game)
+    results = []
+    for _ in range(games):
+        game.reset()
+        score = 0
+        for iteration in range(max_iterations):
+            score += game.slide(player.choose_direction())
+            if not game.add_tile():
+                break
+        results.append((iteration, game.max_value(), score))
+    return results
+
+
+def _play_player_games(args):
+    return play_player_games(*args)
+
+
+def mean_ci(values, z=1.96) -> Tuple[float, float]:
+    """mean and half-width of normal confidence interval"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return float(values.mean()), math.inf
+    return (float(values.mean()),
+            z * float(values.std(ddof=1)) / math.sqrt(len(values)))
+
+
+def wilson_ci(successes: int, n: int, z=1.96) -> Tuple[float, float]:
+    """Wilson score interval (low, high) for a success rate"""
+    if n == 0:
+        return (0.0, 1.0)
+    p = successes / n
+    center = (p + z*z / (2*n)) / (1 + z*z / n)
+    half = z * math.sqrt(p*(1 - p)/n + z*z / (4*n*n)) / (1 + z*z / n)
+    return (center - half, center + half)
+
+
+def print_summary(all_results: Dict[str, List[GameResult]],
+                  reach_values=range(7, 12)):
+    """
+    players tournament table followed by game length / score confidence
+    intervals, score percentiles, and tile reach rates
+    """
+    print_results({name: [(i, v) for i, v, _ in results]
+                   for name, results in all_results.items()})
+    print("-"*80)
+    print(f"{'name':<20s} {'games':<8} {'iter (95% ci)':<20} "
+          f"{'score (95% ci)':<24}")
+    print("-"*80)
+    for name, results in all_results.items():
+        iters = [i for i, _, _ in results]
+        scores = [s for _, _, s in results]
+        iter_mean, iter_ci = mean_ci(iters)
+        score_mean, score_ci = mean_ci(scores)
+        print(f"{name:<20s} {len(results):<8d} "
+              f"{iter_mean:8.1f} +/- {iter_ci:<8.1f} "
+              f"{score_mean:10.1f} +/- {score_ci:<10.1f}")
+        pcts = np.percentile(scores, [10, 50, 90, 99])
+        print("    score p10/p50/p90/p99 " +
+              " ".join(f"{p:.0f}" for p in pcts))
+        for value in reach_values:
+            reached = sum(1 for _, v, _ in results if v >= value)
+            low, high = wilson_ci(reached, len(results))
+            rate = reached / len(results)
+            print(f"    reach {1 << value:<6d} {rate*100:6.2f}% "
+                  f"({low*100:.2f} - {high*100:.2f})")
+
+
+def load_model(path: str) -> Tuple[NumpyDQN, bool]:
+    """
+    model and whether it expects heavy-side flipped grids, from an
+    exported .npz or a dqn_train checkpoint (needs torch)
+    """
+    if path.endswith('.npz'):
+        return (NumpyDQN.load(path), True)
+    import gym_env
+    from dqn_train import load_checkpoint
+    state = load_checkpoint(path)
+    env_cls = getattr(gym_env, state['config']['env'])
+    model = NumpyDQN.from_state_dict(state['policy_net'], env_cls.observation)
+    # augmented runs train without flipping, so the network never relied on it
+    return (model, not state['config']['augment'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Evaluate trained policies with greedy batched games")
+    parser.add_argument('policies', nargs='*',
+                        help="exported .npz weights or dqn_train checkpoints")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--max-iterations', type=int, default=1200)
+    parser.add_argument('--no-canonicalize', action='store_true',
+                        help="don't flip .npz policy grids to heavy side")
+    parser.add_argument('--players', default='',
+                        help="comma separated hand-coded players to compare")
+    parser.add_argument('--player-games', type=int, default=100)
+    parser.add_argument('--processes', type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    all_results = {}
+    for path in args.policies:
+        model, canonicalize = load_model(path)
+        if args.no_canonicalize:
+            canonicalize = False
+        start = time.monotonic()
+        all_results[path] = play_policy_games(
+            model, args.games, canonicalize, args.max_iterations, args.seed)
+        print(f"{path} : {args.games} games in "
+              f"{time.monotonic() - start:.1f} sec")
+
+    names = [name for name in args.players.split(',') if name]
+    if names:
+        with multiprocessing.Pool(args.processes) as pool:
+            for name in names:
+                start = time.monotonic()
+                tasks = [(name, 1, args.seed + i, args.max_iterations)
+                         for i in range(args.player_games)]
+                results = []
+                for game_results in pool.imap(_play_player_games, tasks):
+                    results += game_results
+                all_results[name] = results
+                print(f"{name} : {args.player_games} games in "
+                      f"{time.monotonic() - start:.1f} sec")
+
+    print_summary(all_results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+import numpy as np
+from typing import Dict, Iterator, Optional
+from game2048 import Game2048
+from grid_batch import unpack_grids
+from players import PLAYERS
+
+# one (grid, action, reward, next grid) transition, grids are packed.
+# done is set when no open cell is left for a new tile after the slide
+TRANSITION_DTYPE = np.dtype([
+    ('grid', '<u8'),
+    ('action', 'u1'),
+    ('reward', '<f4'),
+    ('next_grid', '<u8'),
+    ('done', '?'),
+])
+
+
+def play_games(player_name: str, games: int, seed: int,
+               max_iterations: int) -> np.ndarray:
+    """
+    Play games with player, returning every transition.
+    Action is index into "LDUR", reward is sum of merged tile values
+    """
+    random.seed(seed)
+    game = Game2048()
+    player = PLAYERS[player_name](game)
+    transitions = []
+    for _ in range(games):
+        game.reset()
+        for _ in range(max_iterations):
+            grid = game.grid.pack()
+            direction = player.choose_direction()
+            reward = game.slide(direction)
+            done = not game.add_tile()
+            transitions.append((grid, "LDUR".index(direction), reward,
+                                game.grid.pack(), done))
+            if done:
+                break
+    return np.array(transitions, dtype=TRANSITION_DTYPE)
+
+
+def _play_games(args):
+    return play_games(*args)
+
+
+class ShardWriter:
+    """
+    Writes transitions to .npy shards of exactly shard_size transitions
+    (except the last one) and an index.json describing them
+    """
+
+    def __init__(self, directory: str, shard_size: int,
+                 metadata: Optional[Dict] = None):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.metadata = {} if metadata is None else metadata
+        self.shards = []
+        self._buffer = np.empty(shard_size, dtype=TRANSITION_DTYPE)
+        self._count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, transitions: np.ndarray):
+        while len(transitions) > 0:
+            n = min(len(transitions), self.shard_size - self._count)
+            self._buffer[self._count:self._count+n] = transitions[:n]
+            self._count += n
+            transitions = transitions[n:]
+            if self._count == self.shard_size:
+                self._write_shard()
+
+    def _write_shard(self):
+        name = f"shard_{len(self.shards):05d}.npy"
+        np.save(os.path.join(self.directory, name),
+                self._buffer[:self._count])
+        self.shards.append({'file': name, 'count': self._count})
+        self._count = 0
+
+    def close(self):
+        if self._count > 0:
+            self._write_shard()
+        index = dict(self.metadata)
+        index['shards'] = self.shards
+        index['transitions'] = sum(s['count'] for s in self.shards)
+        with open(os.path.join(self.directory, "index.json"), 'w') as f:
+            json.dump(index, f, indent=2)
+
+
+class ShardDataset:
+    """
+    Reads shards written by ShardWriter as memory-mapped arrays.
+    Only shards_in_memory shards are read into memory at once while
+    iterating over shuffled minibatches.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json")) as f:
+            self.index = json.load(f)
+
+    def __len__(self) -> int:
+        return self.index['transitions']
+
+    def shard(self, i: int) -> np.ndarray:
+        path = os.path.join(self.directory, self.index['shards'][i]['file'])
+        return np.load(path, mmap_mode='r')
+
+    def batches(self, batch_size: int,
+                rng: Optional[np.random.Generator] = None,
+                shards_in_memory: int = 4) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        One epoch of shuffled minibatches, grids are unpacked to (B,16).
+        Last partial batch is dropped.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        order = rng.permutation(len(self.index['shards']))
+        leftover = np.empty(0, dtype=TRANSITION_DTYPE)
+        for start in range(0, len(order), shards_in_memory):
+            parts = [leftover]
+            parts += [np.asarray(self.shard(i))
+                      for i in order[start:start+shards_in_memory]]
+            data = np.concatenate(parts)
+            data = data[rng.permutation(len(data))]
+            n_batches = len(data) // batch_size
+            for b in range(n_batches):
+                batch = data[b*batch_size:(b+1)*batch_size]
+                yield {
+                    'grid': unpack_grids(batch['grid']),
+                    'action': batch['action'],
+                    'reward': batch['reward'],
+                    'next_grid': unpack_grids(batch['next_grid']),
+                    'done': batch['done'],
+                }
+            leftover = data[n_batches*batch_size:]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate (grid, action, reward, next grid) shards")
+    parser.add_argument('--player', default='corner', choices=list(PLAYERS))
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--games-per-task', type=int, default=10)
+    parser.add_argument('--processes', type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument('--max-iterations', type=int, default=10000)
+    parser.add_argument('--shard-size', type=int, default=1 << 20,
+                        help="transitions per shard")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='expert_data')
+    args = parser.parse_args()
+
+    tasks = []
+    for i, start in enumerate(range(0, args.games, args.games_per_task)):
+        games = min(args.games_per_task, args.games - start)
+        tasks.append((args.player, games, args.seed + i, args.max_iterations))
+
+    metadata = {'player': args.player, 'games': args.games, 'seed': args.seed}
+    writer = ShardWriter(args.out, args.shard_size, metadata)
+    start = time.monotonic()
+    total = 0
+    with multiprocessing.Pool(args.processes) as pool:
+        for transitions in pool.imap_unordered(_play_games, tasks):
+            writer.write(transitions)
+            total += len(transitions)
+    writer.close()
+    elapsed = time.monotonic() - start
+    print(f"{total} transitions in {len(writer.shards)} shards, "
+          f"{elapsed:.1f} sec, {total / elapsed:.0f} transitions/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,54 +32,63 @@ import random
 class Game2048:
     _all_idxs = list(product(range(4), range(4)))
 
-    def __init__(self, grid: Optional[Grid4x4] = None):
+    def __init__(self, grid: Optional[Grid4x4] = None, rng=None):
         # grid values are distributed this way
         self.grid = Grid4x4(grid)
+        # source of new tiles, random module, a random.Random instance, or a
+        # tile_random.TileRandom
+        self.random = random if rng is None else rng
         if grid is None:
             self.reset()
 
     def display(self):
         self.grid.display()
 
+    def __bytes__(self) -> bytes:
+        return bytes(self.grid)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.grid.__array__(dtype)
+
     def save(self):
         return {'grid': self.grid._grid[:]}
 
     def restore(self, data):
-        self.grid._grid = data['grid']
+        self.grid._grid = data['grid'][:]
 
     def resetRandom(self, max_cells, max_value):
         self.grid = Grid4x4()
-        init_cells = random.choice(list(range(2, max_cells+1)))
-        init_idxs = random.sample(Game2048._all_idxs, init_cells)
+        init_cells = self.random.choice(list(range(2, max_cells+1)))
+        init_idxs = self.random.sample(Game2048._all_idxs, init_cells)
         values = list(range(1, max_value+1))
         for x, y in init_idxs:
-            v = random.choice(values)
+            v = self.random.choice(values)
             self.grid[x, y] = v  # value of 2
 
     def reset(self):
-        # fill 2 spots with either 2 or 4
+        # fill 2 spots with either 2 or 4, same draws as two new tiles.
+        # Not self.add_tile(), subclasses may record moves there
         self.grid = Grid4x4()
-        init_idxs = random.sample(Game2048._all_idxs, 2)
-        for x, y in init_idxs:
-            # 10% chance of a 4 instead of a 2
-            v = 2 if (random.random() > 0.9) else 1
-            self.grid[x, y] = v  # value of 2
+        Game2048.add_tile(self)
+        Game2048.add_tile(self)
 
     def add_tile(self) -> bool:
-        open_idxs = [
-            (x, y) for x, y in Game2048._all_idxs if (self.grid[x, y] == 0)
-        ]
+        # open cells in grid index order, one draw picks the cell and one
+        # the value (batch2048.BatchGame2048 draws the same way)
+        grid = self.grid._grid
+        open_idxs = [i for i, v in enumerate(grid) if v == 0]
         if len(open_idxs) == 0:
             return False
-        x, y = random.choice(open_idxs)
-        v = 2 if (random.random() > 0.9) else 1
-        self.grid[x, y] = v
+        i = self.random.choice(open_idxs)
+        # 10% chance of a 4 instead of a 2
+        grid[i] = 2 if (self.random.random() > 0.9) else 1
         return True
 
     def max_value(self):
         return max(self.grid._grid)
 
-    def slide(self: 'Game2048', direction: str):
+    def slide(self: 'Game2048', direction: str) -> int:
+        """slide and merge values, returns sum of merged tile values"""
         if direction == 'L':
             def get(x, y): return self.grid[x, y]
             def set(x, y, v): self.grid[x, y] = v
@@ -95,6 +104,7 @@ class Game2048:
         else:
             raise RuntimeError(f"invalid direction {direction}")
 
+        score = 0
         for y in range(4):
             prev = 0
             xo = 0
@@ -104,6 +114,7 @@ class Game2048:
                     if v == prev:
                         # merge values
                         set(xo-1, y, v+1)
+                        score += 1 << (v+1)
                         prev = 0
                     else:
                         # move value
@@ -113,3 +124,4 @@ class Game2048:
             while xo < 4:
                 set(xo, y, 0)
                 xo += 1
+        return score
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import asyncio
+import random
+import struct
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from typing import Optional, Tuple
+
+# Protocol : every request is a single byte, b'N' starts a new game and
+# b'L', b'D', b'U', b'R' slide.  Every request gets one fixed size response
+# (status, packed grid, session score).  Clients may pipeline requests.
+NEW_GAME = ord('N')
+RESPONSE = struct.Struct('<BQI')
+OK, GAME_OVER, ERROR = range(3)
+
+# status, packed grid, score
+Response = Tuple[int, int, int]
+
+
+class GameServer:
+    """
+    Hosts one game per connection over TCP or a Unix socket.  A session is
+    only a packed grid and a score, moves are played on a single scratch
+    Game2048, so thousands of sessions cost little memory.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.game = Game2048()
+        if seed is not None:
+            self.game.random = random.Random(seed)
+        self.sessions = 0
+        self.total_sessions = 0
+        self.moves = 0
+        self.server = None
+
+    def new_game(self) -> int:
+        self.game.reset()
+        return self.game.grid.pack()
+
+    def move(self, packed: int, direction: str) -> Tuple[int, int, int]:
+        """(status, packed, merge score) after slide and new tile"""
+        self.moves += 1
+        self.game.grid = Grid4x4.unpack(packed)
+        score = self.game.slide(direction)
+        status = OK if self.game.add_tile() else GAME_OVER
+        return (status, self.game.grid.pack(), score)
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        self.sessions += 1
+        self.total_sessions += 1
+        packed = None
+        score = 0
+        try:
+            while True:
+                requests = await reader.read(4096)
+                if not requests:
+                    break
+                responses = bytearray()
+                for request in requests:
+                    if request == NEW_GAME:
+                        packed = self.new_game()
+                        score = 0
+                        status = OK
+                    elif packed is None or request not in b"LDUR":
+                        status = ERROR
+                    else:
+                        status, packed, merged = self.move(packed,
+                                                           chr(request))
+                        score += merged
+                    responses += RESPONSE.pack(
+                        status, 0 if packed is None else packed, score)
+                    if status == GAME_OVER:
+                        packed = None
+                writer.write(responses)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 2048,
+                    unix: Optional[str] = None):
+        if unix is None:
+            self.server = await asyncio.start_server(self.handle, host, port,
+                                                     backlog=4096)
+        else:
+            self.server = await asyncio.start_unix_server(self.handle, unix,
+                                                          backlog=4096)
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+
+class GameClient:
+    """asyncio client for one GameServer session"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 2048,
+                      unix: Optional[str] = None) -> 'GameClient':
+        if unix is None:
+            reader, writer = await asyncio.open_connection(host, port)
+        else:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        return cls(reader, writer)
+
+    async def request(self, request: bytes) -> Response:
+        self.writer.write(request)
+        data = await self.reader.readexactly(RESPONSE.size)
+        return RESPONSE.unpack(data)
+
+    async def new_game(self) -> Response:
+        return await self.request(b'N')
+
+    async def move(self, direction: str) -> Response:
+        return await self.request(direction.encode())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve(args):
+    server = GameServer(args.seed)
+    await server.start(args.host, args.port, args.unix)
+    where = args.unix if args.unix is not None else f"{args.host}:{args.port}"
+    print(f"serving on {where}")
+    try:
+        while True:
+            moves = server.moves
+            await asyncio.sleep(args.stats_every)
+            print(f"sessions {server.sessions} "
+                  f"(total {server.total_sessions}) "
+                  f"moves/sec {(server.moves - moves) / args.stats_every:.0f}")
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve many 2048 games over TCP or a Unix socket")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2048)
+    parser.add_argument('--unix', default=None,
+                        help="Unix socket path, instead of TCP")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--stats-every', type=float, default=5.0,
+                        help="seconds between stats lines")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import os
+import random
+import struct
+from itertools import product
+from typing import Iterator, List, Optional
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+
+# Each game is stored as a header (seed, initial packed grid, number of
+# event bytes) followed by event bytes.  Most events are a single byte:
+#   0b0vccccdd : slide in "LDUR"[d], then new tile at cell c, value 1+v
+#   0b100000dd : slide in "LDUR"[d], no open cell so game is over
+#   0b11000fff : grid was flipped with FLIPS[f] (gym_env heavy_side_flip)
+#   0xFF       : grid was replaced, followed by 8 byte packed grid
+FILE_MAGIC = b'2048TRC1'
+GAME_HEADER = struct.Struct('<QQI')
+PACKED_GRID = struct.Struct('<Q')
+FLIPS = list(product((False, True), repeat=3))
+GAME_OVER = 0x80
+FLIPPED = 0xC0
+SET_GRID = 0xFF
+
+
+class GameTrace:
+    """One recorded game, states are reconstructed by replaying events"""
+
+    def __init__(self, seed: int, initial: int, events: bytes):
+        self.seed = seed
+        self.initial = initial
+        self.events = events
+
+    def replay(self) -> Iterator[Game2048]:
+        """
+        Yields game after each move (slide and new tile), starting with
+        the initial grid.  Same Game2048 object is updated and yielded.
+        """
+        game = Game2048(Grid4x4.unpack(self.initial))
+        yield game
+        events = self.events
+        i = 0
+        while i < len(events):
+            event = events[i]
+            i += 1
+            if event == SET_GRID:
+                packed, = PACKED_GRID.unpack_from(events, i)
+                i += PACKED_GRID.size
+                game.grid = Grid4x4.unpack(packed)
+            elif event & 0xF8 == FLIPPED:
+                game.grid = game.grid.flip(*FLIPS[event & 0x7])
+            elif event & 0xFC == GAME_OVER:
+                game.slide("LDUR"[event & 0x3])
+                yield game
+            else:
+                game.slide("LDUR"[event & 0x3])
+                game.grid._grid[(event >> 2) & 0xF] = 1 + (event >> 6)
+                yield game
+
+    def moves(self) -> List[str]:
+        directions = []
+        i = 0
+        while i < len(self.events):
+            event = self.events[i]
+            if event == SET_GRID:
+                i += PACKED_GRID.size
+            elif event & 0xF8 != FLIPPED:
+                directions.append("LDUR"[event & 0x3])
+            i += 1
+        return directions
+
+    def state_at(self, move: int) -> Grid4x4:
+        """grid after move moves (0 is initial grid)"""
+        for i, game in enumerate(self.replay()):
+            if i == move:
+                return Grid4x4(game.grid)
+        raise IndexError(f"game only has {i} moves")
+
+
+class TraceWriter:
+    """
+    Appends games to a directory of chunk files with games_per_chunk
+    games each
+    """
+
+    def __init__(self, directory: str, games_per_chunk: int = 100000):
+        self.directory = directory
+        self.games_per_chunk = games_per_chunk
+        os.makedirs(directory, exist_ok=True)
+        self.chunk = len(trace_files(directory))
+        self.games = 0
+        self._file = None
+
+    def write_game(self, seed: int, initial: int, events: bytes):
+        if self._file is None:
+            path = os.path.join(self.directory,
+                                f"trace_{self.chunk:05d}.bin")
+            self._file = open(path, 'wb')
+            self._file.write(FILE_MAGIC)
+        self._file.write(GAME_HEADER.pack(seed, initial, len(events)))
+        self._file.write(events)
+        self.games += 1
+        if self.games % self.games_per_chunk == 0:
+            self._file.close()
+            self._file = None
+            self.chunk += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def trace_files(directory: str) -> List[str]:
+    return sorted(os.path.join(directory, name)
+                  for name in os.listdir(directory)
+                  if name.startswith("trace_") and name.endswith(".bin"))
+
+
+def read_traces(directory: str) -> Iterator[GameTrace]:
+    """Lazily read every game from directory written by TraceWriter"""
+    for path in trace_files(directory):
+        with open(path, 'rb') as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise RuntimeError(f"{path} is not a trace file")
+            while True:
+                header = f.read(GAME_HEADER.size)
+                if len(header) < GAME_HEADER.size:
+                    break
+                seed, initial, size = GAME_HEADER.unpack(header)
+                yield GameTrace(seed, initial, f.read(size))
+
+
+class TracingGame(Game2048):
+    """
+    Game2048 that records every game it plays to a TraceWriter.
+
+    A move is recorded when add_tile() is called, using the last slide()
+    so players can try out slides and restore() before committing to one.
+    Each game gets its own random seed so it can be played again.  The seed
+    is applied to rng (a random.Random of its own by default) with seed().
+    """
+
+    def __init__(self, writer: TraceWriter, grid: Optional[Grid4x4] = None,
+                 rng=None):
+        self.writer = writer
+        self._events = None
+        super().__init__(grid, random.Random() if rng is None else rng)
+        if grid is not None:
+            self._new_seed()
+            self._start_game()
+
+    def _new_seed(self):
+        self.finish_game()
+        self.seed = random.getrandbits(64)
+        self.random.seed(self.seed)
+
+    def _start_game(self):
+        self._events = bytearray()
+        self._initial = self.grid.pack()
+        self._expected = self.grid._grid[:]
+        self._before = None
+        self._direction = None
+
+    def finish_game(self):
+        """write out current game, called automatically when game ends"""
+        if self._events:
+            self.writer.write_game(self.seed, self._initial,
+                                   bytes(self._events))
+        self._events = None
+
+    def reset(self):
+        self._new_seed()
+        super().reset()
+        self._start_game()
+
+    def resetRandom(self, max_cells, max_value):
+        self._new_seed()
+        super().resetRandom(max_cells, max_value)
+        self._start_game()
+
+    def slide(self, direction: str):
+        self._before = self.grid._grid[:]
+        self._direction = direction
+        super().slide(direction)
+
+    def _record_before(self):
+        # record how grid changed since last move, if it was modified
+        # by something other than slide() and add_tile()
+        before = self._before
+        if before != self._expected:
+            expected = Grid4x4()
+            expected._grid = self._expected
+            for i, flip in enumerate(FLIPS):
+                if expected.flip(*flip)._grid == before:
+                    self._events.append(FLIPPED | i)
+                    break
+            else:
+                grid = Grid4x4()
+                grid._grid = before
+                self._events.append(SET_GRID)
+                self._events += PACKED_GRID.pack(grid.pack())
+
+    def add_tile(self) -> bool:
+        if self._events is None:
+            raise RuntimeError("game is over, reset() before playing again")
+        if self._before is None:
+            raise RuntimeError("add_tile() called without slide()")
+        self._record_before()
+        direction = "LDUR".index(self._direction)
+        after_slide = self.grid._grid[:]
+        success = super().add_tile()
+        if success:
+            cell = next(i for i, (a, b) in
+                        enumerate(zip(after_slide, self.grid._grid))
+                        if a != b)
+            value = self.grid._grid[cell]
+            self._events.append(((value - 1) << 6) | (cell << 2) | direction)
+            self._expected = self.grid._grid[:]
+            self._before = None
+        else:
+            self._events.append(GAME_OVER | direction)
+            self.finish_game()
+        return success
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize or replay recorded games")
+    parser.add_argument('directory')
+    parser.add_argument('--show', type=int, default=None,
+                        help="display every state of this game number")
+    args = parser.parse_args()
+
+    games = 0
+    moves = 0
+    size = 0
+    for i, trace in enumerate(read_traces(args.directory)):
+        games += 1
+        moves += len(trace.moves())
+        size += GAME_HEADER.size + len(trace.events)
+        if i == args.show:
+            print(f"game {i} seed {trace.seed}")
+            for move, game in enumerate(trace.replay()):
+                print(f"move {move}")
+                game.display()
+    print(f"games {games}")
+    print(f"moves {moves}")
+    if moves > 0:
+        print(f"bytes/move {size / moves:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,38 +22,74 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from typing import Iterable, Iterator, Optional, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# cell index permutation of each flip, filled in below the class
+_flip_perms: Dict[Tuple[bool, bool, bool], List[int]] = {}
+# value of each character in text grids
+_char_values = {c: i for i, c in enumerate(".123456789ABCDEF")}
 
 
 class Grid4x4:
-    """ 4x4 grid of integer values between 0 and 15"""
+    """
+    4x4 grid of integer values between 0 and 15
+
+    Grids convert to and from bytes (one byte per cell, see from_buffer),
+    and numpy arrays (np.asarray(grid) is a (16,) uint8 row).  For many
+    grids at once use the array helpers in grid_batch.
+    """
 
     GridListType = Iterable[Iterable[int]]
+    FlipType = Tuple[bool, bool, bool]
 
     def __init__(self,
                  vals: Optional[Union[GridListType, str, 'Grid4x4']] = None):
-        # TODO use numpy array instead of flat list
-        self._grid = [0 for _ in range(16)]
+        """
+        vals is another grid, text with 4 lines of ".123456789ABCDEF"
+        characters, 4 rows of values, 16 values, or a numpy (4,4) or (16,)
+        array
+        """
         if vals is None:
-            pass
+            self._grid = [0] * 16
         elif isinstance(vals, Grid4x4):
             self._grid = vals._grid[:]
         elif isinstance(vals, str):
-            lookup = {c: i for i, c in enumerate(".123456789ABCDEF")}
-            y = 0
-            for line in vals.split('\n'):
-                line = line.strip()
-                if len(line) == 0:
-                    continue
-                assert len(line) == 4
-                for x, c in enumerate(line):
-                    self[x, y] = lookup[c]
-                y += 1
+            rows = [line.strip() for line in vals.split('\n')]
+            rows = [row for row in rows if len(row) > 0]
+            assert len(rows) == 4
+            assert all(len(row) == 4 for row in rows)
+            self._grid = [_char_values[c] for row in rows for c in row]
         else:
-            for y, row in enumerate(vals):
-                for x, v in enumerate(row):
-                    assert 0 <= v < 16
-                    self[x, y] = v
+            if hasattr(vals, 'tolist'):
+                # numpy array
+                vals = vals.tolist()
+            vals = list(vals)
+            if len(vals) == 16 and all(isinstance(v, int) for v in vals):
+                self._grid = vals
+            else:
+                self._grid = [0] * 16
+                for y, row in enumerate(vals):
+                    row = list(row)
+                    assert len(row) <= 4
+                    self._grid[y*4:y*4 + len(row)] = row
+            assert len(self._grid) == 16
+            assert 0 <= min(self._grid) and max(self._grid) < 16
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'Grid4x4':
+        """grid from 16 bytes, one per cell (e.g. bytes(grid))"""
+        grid = cls()
+        data = memoryview(buffer).tobytes()
+        assert len(data) == 16
+        grid._grid = list(data)
+        return grid
+
+    def __bytes__(self) -> bytes:
+        return bytes(self._grid)
+
+    def __array__(self, dtype=None, copy=None):
+        import numpy as np
+        return np.array(self._grid, dtype=np.uint8 if dtype is None else dtype)
 
     def __getitem__(self: 'Grid4x4', idx: Tuple[int, int]) -> int:
         x, y = idx
@@ -77,6 +113,11 @@ class Grid4x4:
              flip_x: bool,
              flip_y: bool,
              swap_xy: bool) -> "Grid4x4":
+        perm = _flip_perms.get((flip_x, flip_y, swap_xy))
+        if perm is not None:
+            new_grid = Grid4x4()
+            new_grid._grid = [self._grid[i] for i in perm]
+            return new_grid
         xo, xi = (3, -1) if flip_x else (0, 1)
         yo, yi = (3, -1) if flip_y else (0, 1)
         new_grid = Grid4x4()
@@ -89,6 +130,23 @@ class Grid4x4:
                 new_grid[xn, yn] = old_grid[x, y]
         return new_grid
 
+    @staticmethod
+    def flip_direction(direction: str,
+                       flip_x: bool,
+                       flip_y: bool,
+                       swap_xy: bool) -> str:
+        """
+        Slide direction (L,D,U,R) on flipped grid that matches direction
+        on original grid
+        """
+        if flip_x:
+            direction = {'L': 'R', 'R': 'L'}.get(direction, direction)
+        if flip_y:
+            direction = {'U': 'D', 'D': 'U'}.get(direction, direction)
+        if swap_xy:
+            direction = {'L': 'U', 'U': 'L', 'R': 'D', 'D': 'R'}[direction]
+        return direction
+
     def heavy_side(self):
         # return L,D,U,R for the "heavy-side" of grid
         xsum = 0.0
@@ -104,13 +162,17 @@ class Grid4x4:
             side = 'D' if (ysum > 0) else 'U'
         return (side, xsum, ysum)
 
+    def heavy_side_flip_args(self) -> FlipType:
+        """(flip_x, flip_y, swap_xy) arguments used by heavy_side_flip()"""
+        _, xside, yside = self.heavy_side()
+        return (xside > 0, yside > 0, abs(yside) > abs(xside))
+
     def heavy_side_flip(self):
         """
         Will flip grid so most non-zero elements are on left top
         Will also swap x and y axes so most element are on left versus top
         """
-        _, xside, yside = self.heavy_side()
-        return self.flip(xside > 0, yside > 0, abs(yside) > abs(xside))
+        return self.flip(*self.heavy_side_flip_args())
 
     def __str__(self) -> str:
         msg = ""
@@ -143,3 +205,53 @@ class Grid4x4:
 
     def display(self: 'Grid4x4'):
         print(self)
+
+    def pack(self: 'Grid4x4') -> int:
+        """return grid as 64-bit integer with 4 bits per cell"""
+        packed = 0
+        for i, v in enumerate(self._grid):
+            packed |= v << (4*i)
+        return packed
+
+    @classmethod
+    def unpack(cls, packed: int) -> 'Grid4x4':
+        """create grid from value returned by pack()"""
+        grid = cls()
+        grid._grid = [(packed >> (4*i)) & 0xF for i in range(16)]
+        return grid
+
+    def canonical(self: 'Grid4x4') -> Tuple[int, FlipType]:
+        """
+        Smallest packed value over the 8 flips / rotations of grid.
+        Returns packed value and (flip_x, flip_y, swap_xy) arguments
+        that flip() needs to produce the canonical grid
+        """
+        best = None
+        best_flip = None
+        for flip, perm in _symmetries:
+            packed = 0
+            for i, src in enumerate(perm):
+                packed |= self._grid[src] << (4*i)
+            if best is None or packed < best:
+                best = packed
+                best_flip = flip
+        return (best, best_flip)
+
+
+def _make_symmetries():
+    """
+    (flip, perm) for every flip, where flipped._grid[i] == _grid[perm[i]]
+    """
+    symmetries = []
+    identity = Grid4x4()
+    identity._grid = list(range(16))
+    for flip_x in (False, True):
+        for flip_y in (False, True):
+            for swap_xy in (False, True):
+                flip = (flip_x, flip_y, swap_xy)
+                symmetries.append((flip, identity.flip(*flip)._grid))
+    return symmetries
+
+
+_symmetries = _make_symmetries()
+_flip_perms.update(_symmetries)
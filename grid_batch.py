@@ -0,0 +1,218 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import numpy as np
+from itertools import product
+from grid4x4 import Grid4x4
+from typing import Iterable, List
+
+# bit offset of each cell in packed grid, see Grid4x4.pack()
+_SHIFTS = np.arange(16, dtype=np.uint64) * np.uint64(4)
+
+# (flip_x, flip_y, swap_xy) arguments for each of the 8 grid symmetries
+FLIPS = list(product((False, True), repeat=3))
+
+
+def _make_flip_tables():
+    identity = Grid4x4()
+    identity._grid = list(range(16))
+    cells = np.array([identity.flip(*flip)._grid for flip in FLIPS],
+                     dtype=np.intp)
+    actions = np.array([["LDUR".index(Grid4x4.flip_direction(d, *flip))
+                         for d in "LDUR"] for flip in FLIPS], dtype=np.intp)
+    return cells, actions
+
+
+# FLIP_CELLS[f, i] is cell of original grid that lands in cell i after flip f
+# FLIP_ACTIONS[f, a] is action on flipped grid that matches action a
+# UNFLIP_ACTIONS[f, b] is action on original grid that matches action b on
+# flipped grid
+FLIP_CELLS, FLIP_ACTIONS = _make_flip_tables()
+UNFLIP_ACTIONS = np.argsort(FLIP_ACTIONS, axis=1)
+
+# cell offsets from grid center, used by heavy_side_flips
+_X_OFFSET = np.tile(np.arange(4), 4) - 1.5
+_Y_OFFSET = np.repeat(np.arange(4), 4) - 1.5
+
+
+def pack_grids(grids: np.ndarray) -> np.ndarray:
+    """(N,16) array of cell values to (N,) uint64 packed grids"""
+    grids = np.asarray(grids, dtype=np.uint64)
+    return np.bitwise_or.reduce(grids << _SHIFTS, axis=-1)
+
+
+def unpack_grids(packed: np.ndarray) -> np.ndarray:
+    """(N,) uint64 packed grids to (N,16) uint8 array of cell values"""
+    packed = np.asarray(packed, dtype=np.uint64)
+    return ((packed[..., None] >> _SHIFTS) & np.uint64(0xF)).astype(np.uint8)
+
+
+def flip_grids(grids: np.ndarray, flips: np.ndarray) -> np.ndarray:
+    """apply flip index flips[n] (see FLIPS) to each row of (N,16) grids"""
+    return np.take_along_axis(grids, FLIP_CELLS[flips], axis=1)
+
+
+def flip_actions(actions: np.ndarray, flips: np.ndarray) -> np.ndarray:
+    """map actions (index into "LDUR") to match flip_grids()"""
+    return FLIP_ACTIONS[flips, actions]
+
+
+def heavy_side_flips(grids: np.ndarray) -> np.ndarray:
+    """flip index (see FLIPS) used by Grid4x4.heavy_side_flip() for grids"""
+    v = np.where(grids > 0, 1.0, -1.0)
+    xsum = v @ _X_OFFSET
+    ysum = v @ _Y_OFFSET
+    flip_x = xsum > 0
+    flip_y = ysum > 0
+    swap_xy = np.abs(ysum) > np.abs(xsum)
+    return flip_x * 4 + flip_y * 2 + swap_xy * 1
+
+
+def canonical_packed(grids: np.ndarray) -> np.ndarray:
+    """smallest packing over the 8 flips, same as Grid4x4.canonical()[0]"""
+    grids = np.asarray(grids)
+    return np.stack([pack_grids(grids[:, FLIP_CELLS[f]])
+                     for f in range(len(FLIPS))]).min(axis=0)
+
+
+def one_hot(grids: np.ndarray, levels: int = 12) -> np.ndarray:
+    """
+    (N,16) grids to (N,16*levels) float32 observations laid out like
+    EnvironmentBase.get_observation_one_hot()
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    n = grids.shape[0]
+    obs = np.zeros((n, 16, levels), dtype=np.float32)
+    rows = np.arange(n)[:, None]
+    cols = np.arange(16)[None, :]
+    obs[rows, cols, grids] = 1.0
+    return obs.reshape(n, 16 * levels)
+
+
+def bit_vec(grids: np.ndarray) -> np.ndarray:
+    """
+    (N,16) grids to (N,64) float32 observations laid out like
+    EnvironmentBase.get_observation_bit_vec()
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    bits = (grids[:, :, None] >> np.arange(4, dtype=np.uint8)) & 1
+    return bits.reshape(grids.shape[0], 64).astype(np.float32)
+
+
+def raw(grids: np.ndarray) -> np.ndarray:
+    """(N,16) grids as float32 observations like gym_env.Environment1"""
+    return np.asarray(grids, dtype=np.float32)
+
+
+# observation encodings by name
+OBSERVATIONS = {
+    'raw': raw,
+    'bit_vec': bit_vec,
+    'one_hot': one_hot,
+}
+
+
+# board files : text files have one board per line as 16 characters of
+# _BOARD_CHARS (row major, like str(Grid4x4) without the line breaks),
+# binary files are little-endian uint64 packed grids
+_BOARD_CHARS = np.frombuffer(b".123456789ABCDEF", dtype=np.uint8)
+_CHAR_VALUES = np.full(256, 255, dtype=np.uint8)
+_CHAR_VALUES[_BOARD_CHARS] = np.arange(16, dtype=np.uint8)
+_CHAR_VALUES[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+_WHITESPACE = np.frombuffer(b" \t\r\n", dtype=np.uint8)
+
+
+def grids_to_array(grids: Iterable[Grid4x4]) -> np.ndarray:
+    """Grid4x4 objects to (N,16) uint8 array of cell values"""
+    return np.array([grid._grid for grid in grids], dtype=np.uint8)
+
+
+def array_to_grids(grids: np.ndarray) -> List[Grid4x4]:
+    """(N,16) array of cell values to Grid4x4 objects"""
+    result = []
+    for row in np.asarray(grids).reshape(-1, 16).tolist():
+        grid = Grid4x4()
+        grid._grid = row
+        result.append(grid)
+    return result
+
+
+def grids_from_buffer(buffer) -> np.ndarray:
+    """
+    (N,16) uint8 view of a buffer with one byte per cell (bytes, bytearray,
+    mmap, ...), no copy is made so changes to a writable buffer show
+    """
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 16)
+
+
+def parse_boards(text) -> np.ndarray:
+    """
+    (N,16) grids from board text (str or bytes).  Whitespace is ignored,
+    so str(Grid4x4) output with its 4 lines per board also parses
+    """
+    if isinstance(text, str):
+        text = text.encode('ascii')
+    data = np.frombuffer(text, dtype=np.uint8)
+    data = data[~np.isin(data, _WHITESPACE)]
+    if len(data) % 16 != 0:
+        raise ValueError(f"{len(data)} board characters is not a multiple "
+                         "of 16")
+    grids = _CHAR_VALUES[data]
+    if (grids == 255).any():
+        bad = chr(data[np.argmax(grids == 255)])
+        raise ValueError(f"invalid board character {bad!r}")
+    return grids.reshape(-1, 16)
+
+
+def format_boards(grids: np.ndarray) -> str:
+    """(N,16) grids as board text, one board per line"""
+    grids = np.asarray(grids, dtype=np.uint8).reshape(-1, 16)
+    lines = np.full((len(grids), 17), ord('\n'), dtype=np.uint8)
+    lines[:, :16] = _BOARD_CHARS[grids]
+    return lines.tobytes().decode('ascii')
+
+
+def write_boards(path: str, grids: np.ndarray):
+    """board file, text when path ends in .txt otherwise packed binary"""
+    grids = np.asarray(grids, dtype=np.uint8).reshape(-1, 16)
+    if path.endswith('.txt'):
+        with open(path, 'w') as f:
+            f.write(format_boards(grids))
+    else:
+        pack_grids(grids).astype('<u8').tofile(path)
+
+
+def read_packed(path: str) -> np.ndarray:
+    """packed grids of binary board file, memory-mapped read-only"""
+    if os.path.getsize(path) == 0:
+        # an empty file can't be memory-mapped
+        return np.empty(0, dtype='<u8')
+    return np.memmap(path, dtype='<u8', mode='r')
+
+
+def read_boards(path: str) -> np.ndarray:
+    """(N,16) grids from board file written by write_boards()"""
+    if path.endswith('.txt'):
+        with open(path, 'rb') as f:
+            return parse_boards(f.read())
+    return unpack_grids(read_packed(path))
@@ -20,22 +20,46 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import gymnasium as gym
 import math
-import random
+from functools import cached_property
 from game2048 import Game2048
 
 
 class EnvironmentBase:
-    def __init__(self):
-        self.game = Game2048()
+    # environments that fold the grid to its heavy side before each
+    # observation only do so when this is True.  Set to False when the
+    # replay memory augments samples with random flips instead
+    # (see replay.ReplayBuffer)
+    canonicalize = True
+    # name of grid_batch.OBSERVATIONS encoding that matches get_observation()
+    observation = 'one_hot'
+    # optional visit_counter.NoveltyBonus added to every step reward,
+    # assign one to enable count-based exploration
+    novelty = None
+
+    def __init__(self, rng=None):
+        # rng is passed to Game2048 and also used for random restarts
+        self.game = Game2048(rng=rng)
         self.reset()
-        self.action_space = gym.spaces.Discrete(4)
-        self.observation_space = gym.spaces.Box(0, 11, shape=(16,))
+
+    # gymnasium is only imported when spaces are used
+    @cached_property
+    def action_space(self):
+        import gymnasium as gym
+        return gym.spaces.Discrete(4)
+
+    @cached_property
+    def observation_space(self):
+        import gymnasium as gym
+        return gym.spaces.Box(0, 11, shape=(16,))
 
     def get_observation(self):
         raise RuntimeError("TODO")
 
+    def flip_heavy_side(self):
+        if self.canonicalize:
+            self.game.grid = self.game.grid.heavy_side_flip()
+
     def get_observation_one_hot(self):
         obs = []
 
@@ -89,6 +113,8 @@ class EnvironmentBase:
         self.game.slide(direction)
         success = self.game.add_tile()
         terminated, reward = self.get_reward(success)
+        if self.novelty is not None:
+            reward += self.novelty(self.game.grid)
         truncated = False
         info = {}
         observation = self.get_observation()
@@ -102,11 +128,15 @@ class EnvironmentBase:
 
 
 class Environment1(EnvironmentBase):
+    observation = 'raw'
+
     def get_observation(self):
         return self.game.grid._grid[:]
 
 
 class Environment2(EnvironmentBase):
+    observation = 'bit_vec'
+
     def get_observation(self):
         return self.get_observation_bit_vec()
 
@@ -141,14 +171,14 @@ class Environment4(EnvironmentBase):
 
 class Environment5(Environment4):
     def get_observation(self):
-        self.game.grid = self.game.grid.heavy_side_flip()
+        self.flip_heavy_side()
         return self.get_observation_one_hot()
 
 
 class Environment6(Environment5):
     def reset(self):
         super().reset()
-        if random.random() > 0.75:
+        if self.game.random.random() > 0.75:
             self.game.resetRandom(5, 7)
             self.game.slide("U")
             self.game.slide("L")
@@ -159,7 +189,7 @@ class Environment6(Environment5):
 
 class Environment7(EnvironmentBase):
     def get_observation(self):
-        self.game.grid = self.game.grid.heavy_side_flip()
+        self.flip_heavy_side()
         return self.get_observation_one_hot()
 
     def get_reward(self, success):
@@ -184,7 +214,7 @@ class Environment8(EnvironmentBase):
         return (state, info)
 
     def get_observation(self):
-        self.game.grid = self.game.grid.heavy_side_flip()
+        self.flip_heavy_side()
         return self.get_observation_one_hot()
 
     def get_score(self):
@@ -210,9 +240,9 @@ class Environment8(EnvironmentBase):
 
 
 class Environment9(EnvironmentBase):
-    def __init__(self):
+    def __init__(self, rng=None):
         self.iterations = 0
-        super().__init__()
+        super().__init__(rng)
 
     def reset(self):
         super().reset()
@@ -220,11 +250,11 @@ class Environment9(EnvironmentBase):
         random_stop_iteration = 40000
         random_thresh = self.iterations / random_stop_iteration
         print("Random thresh", random_thresh)
-        if random.random() > random_thresh:
+        if self.game.random.random() > random_thresh:
             self.game.resetRandom(7, 9)
             self.game.slide("U")
             self.game.slide("L")
-            self.game.grid = self.game.grid.heavy_side_flip()
+            self.flip_heavy_side()
             self.game.display()
         self.prev_score = self.get_score()
         state = self.get_observation()
@@ -232,7 +262,7 @@ class Environment9(EnvironmentBase):
         return (state, info)
 
     def get_observation(self):
-        self.game.grid = self.game.grid.heavy_side_flip()
+        self.flip_heavy_side()
         return self.get_observation_one_hot()
 
     def get_score(self):
@@ -269,11 +299,11 @@ class Environment10(EnvironmentBase):
         random_stop_iteration = 10000
         random_thresh = self.iterations / random_stop_iteration
         print("Random thresh", random_thresh)
-        if random.random() > random_thresh:
+        if self.game.random.random() > random_thresh:
             self.game.resetRandom(7, 9)
             self.game.slide("U")
             self.game.slide("L")
-            self.game.grid = self.game.grid.heavy_side_flip()
+            self.flip_heavy_side()
             self.game.display()
         self.prev_score = self.get_score()
         state = self.get_observation()
@@ -281,7 +311,7 @@ class Environment10(EnvironmentBase):
         return (state, info)
 
     def get_observation(self):
-        self.game.grid = self.game.grid.heavy_side_flip()
+        self.flip_heavy_side()
         return self.get_observation_one_hot()
 
     def get_reward(self, success):
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from collections import Counter, deque
+import numpy as np
+from typing import Callable, Dict
+from dqn_numpy import NumpyDQN
+from game2048 import Game2048
+from players import PlayerPolicy
+
+PolicyType = Callable[[np.ndarray], np.ndarray]
+
+
+class InferenceClient:
+    """
+    Handle used by one game worker (thread or process) to request actions.
+    Only one request can be outstanding per client.
+    """
+
+    def __init__(self, client_id, requests, responses):
+        self.client_id = client_id
+        self.requests = requests
+        self.responses = responses
+
+    def act(self, obs: np.ndarray) -> int:
+        self.requests.put((self.client_id, obs, time.monotonic()))
+        return self.responses.get()
+
+
+class InferenceServer:
+    """
+    Answers observation requests from many clients with batched policy calls.
+
+    policy maps a (B, n_obs) float32 array to (B, n_actions) action values,
+    each client gets back the index of its best action.  A batch is run as
+    soon as every client is waiting, max_batch requests arrived, or
+    max_wait seconds passed since the first request of the batch.
+
+    With multiprocess, clients talk to the server over multiprocessing
+    queues and can be handed to worker processes; otherwise clients are
+    meant for threads of this process.
+    """
+
+    def __init__(self, policy: PolicyType, num_clients: int,
+                 max_batch: int = 256, max_wait: float = 0.002,
+                 multiprocess: bool = True):
+        self.policy = policy
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        queue_cls = multiprocessing.Queue if multiprocess else queue.Queue
+        self.requests = queue_cls()
+        self.clients = [InferenceClient(i, self.requests, queue_cls())
+                        for i in range(num_clients)]
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=100000)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.requests.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _next_batch(self):
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < min(self.max_batch, len(self.clients)):
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # answer this batch before stopping
+                self.requests.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            obs = np.stack([obs for _, obs, _ in batch])
+            actions = np.argmax(self.policy(obs), axis=1)
+            now = time.monotonic()
+            for (client_id, _, submitted), action in zip(batch, actions):
+                self.clients[client_id].responses.put(int(action))
+                self.latencies.append(now - submitted)
+            self.batch_sizes[len(batch)] += 1
+
+    def stats(self) -> Dict:
+        batches = sum(self.batch_sizes.values())
+        requests = sum(n * c for n, c in self.batch_sizes.items())
+        # no latencies before the first request is answered
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            'batches': batches,
+            'requests': requests,
+            'mean_batch': requests / batches if batches > 0 else 0.0,
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+            'latency_p50': float(np.percentile(latencies, 50)),
+            'latency_p99': float(np.percentile(latencies, 99)),
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"requests       {stats['requests']}")
+        print(f"batches        {stats['batches']}")
+        print(f"mean batch     {stats['mean_batch']:.1f}")
+        print(f"latency p50    {stats['latency_p50']*1000:.2f} ms")
+        print(f"latency p99    {stats['latency_p99']*1000:.2f} ms")
+        print("batch size histogram")
+        # bucket batch sizes by powers of 2
+        buckets = Counter()
+        for size, count in stats['batch_sizes'].items():
+            buckets[1 << (size - 1).bit_length()] += count
+        for size, count in sorted(buckets.items()):
+            print(f"    <= {size:<6d} {count}")
+
+
+def play_client_games(client, games, seed, observation='one_hot',
+                      max_iterations=10000):
+    """run games with policy served through client, return moves played"""
+    random.seed(seed)
+    game = Game2048()
+    player = PlayerPolicy(game, client.act, observation=observation)
+    moves = 0
+    for _ in range(games):
+        iteration, _ = player.run(max_iterations)
+        moves += iteration + 1
+    return moves
+
+
+def _play_client_games(client, games, seed, observation, results):
+    results.put(play_client_games(client, games, seed, observation))
+
+
+def random_policy(n_obs=192, n_actions=4, hidden=128, seed=0):
+    """untrained DQN with the notebook layer sizes, for benchmarks"""
+    rng = np.random.default_rng(seed)
+    sizes = [n_obs, hidden, hidden, n_actions]
+    layers = [(rng.normal(size=(n_out, n_in)) / 16, np.zeros(n_out))
+              for n_in, n_out in zip(sizes[:-1], sizes[1:])]
+    return NumpyDQN(layers)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play many games through a batched inference server")
+    parser.add_argument('--clients', type=int, default=32,
+                        help="number of concurrent game workers")
+    parser.add_argument('--games', type=int, default=4,
+                        help="games per client")
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait', type=float, default=0.002,
+                        help="seconds to wait for a batch to fill")
+    parser.add_argument('--threads', action='store_true',
+                        help="run clients as threads instead of processes")
+    parser.add_argument('--weights', default=None,
+                        help="weights from dqn_numpy.export_dqn, "
+                        "untrained network if not set")
+    args = parser.parse_args()
+
+    if args.weights is None:
+        policy = random_policy()
+    else:
+        policy = NumpyDQN.load(args.weights)
+    server = InferenceServer(policy, args.clients, args.max_batch,
+                             args.max_wait, multiprocess=not args.threads)
+    if args.threads:
+        results = queue.Queue()
+        worker_cls = threading.Thread
+    else:
+        results = multiprocessing.Queue()
+        worker_cls = multiprocessing.Process
+    start = time.monotonic()
+    with server:
+        workers = [worker_cls(target=_play_client_games,
+                              args=(client, args.games, i,
+                                    policy.observation, results))
+                   for i, client in enumerate(server.clients)]
+        for worker in workers:
+            worker.start()
+        moves = sum(results.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+    elapsed = time.monotonic() - start
+    print(f"{moves} moves in {elapsed:.1f} sec, "
+          f"{moves / elapsed:.0f} moves/sec")
+    server.print_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,13 +23,53 @@
 # SOFTWARE.
 
 
+import argparse
 import curses
+import threading
+import time
 from game2048 import Game2048
+from game_trace import TraceWriter, TracingGame, read_traces
+from players import PLAYERS
+from typing import Iterator, List, NamedTuple, Optional
 
+CELL_WIDTH = 6
+STATUS_ROW = 5
 
-def main(stdscr):
-    # Clear screen
-    game = Game2048()
+
+class Renderer:
+    """
+    Draws a grid and status lines, only cells and lines that changed since
+    the last draw are written to the screen
+    """
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.cells: List[Optional[int]] = [None] * 16
+        self.lines: List[str] = []
+
+    @staticmethod
+    def cell_text(value: int) -> str:
+        text = '.' if value == 0 else str(1 << value)
+        return text.rjust(CELL_WIDTH - 1) + ' '
+
+    def draw(self, grid: List[int], lines: List[str]):
+        for i, value in enumerate(grid):
+            if self.cells[i] != value:
+                self.stdscr.addstr(i // 4, (i % 4) * CELL_WIDTH,
+                                   self.cell_text(value))
+                self.cells[i] = value
+        for row in range(max(len(lines), len(self.lines))):
+            line = lines[row] if row < len(lines) else ""
+            if row < len(self.lines) and self.lines[row] == line:
+                continue
+            self.stdscr.move(STATUS_ROW + row, 0)
+            self.stdscr.clrtoeol()
+            self.stdscr.addstr(line)
+        self.lines = list(lines)
+        self.stdscr.refresh()
+
+
+def play(stdscr, game):
     key_lookup = {
         'KEY_LEFT': 'L',
         'KEY_RIGHT': 'R',
@@ -37,16 +77,14 @@ def main(stdscr):
         'KEY_DOWN': 'D',
     }
     stdscr.keypad(True)
+    renderer = Renderer(stdscr)
 
     iteration = 0
 
     def disp(msg):
-        stdscr.clear()
-        stdscr.addstr(str(game.grid))
-        stdscr.addstr(f"\nIteration {iteration}\n")
-        stdscr.addstr(f"Max Value {game.max_value()}\n")
-        stdscr.addstr(msg + '\n')
-        stdscr.refresh()
+        renderer.draw(game.grid._grid, [f"Iteration {iteration}",
+                                        f"Max Value {game.max_value()}",
+                                        msg])
 
     msg = ""
     while True:
@@ -81,5 +119,209 @@ def main(stdscr):
         msg = ''
 
 
+class Frame(NamedTuple):
+    game: int
+    iteration: int
+    grid: List[int]
+    score: Optional[int]
+    game_over: bool
+
+
+def player_frames(player, games: int,
+                  max_iterations: int = 1200) -> Iterator[Frame]:
+    """frames of games played by a players.PLAYERS player"""
+    game = player.game
+    for trial in range(games):
+        game.reset()
+        score = 0
+        yield Frame(trial, 0, game.grid._grid[:], score, False)
+        for iteration in range(1, max_iterations + 1):
+            score += game.slide(player.choose_direction())
+            game_over = not game.add_tile()
+            yield Frame(trial, iteration, game.grid._grid[:], score,
+                        game_over)
+            if game_over:
+                break
+
+
+def trace_frames(directory: str, first_game: int = 0) -> Iterator[Frame]:
+    """frames of games recorded with game_trace, scores are not recorded"""
+    for trial, trace in enumerate(read_traces(directory)):
+        if trial < first_game:
+            continue
+        frame = None
+        for iteration, game in enumerate(trace.replay()):
+            if frame is not None:
+                yield frame
+            frame = Frame(trial, iteration, game.grid._grid[:], None, False)
+        yield frame._replace(game_over=True)
+
+
+class Spectator:
+    """
+    Pulls frames on an engine thread at speed moves/sec, or as fast as
+    possible with fast, so drawing never slows down play.  The latest
+    frame is in frame.  Control methods can be called from any thread.
+    """
+
+    def __init__(self, frames: Iterator[Frame], speed: float = 10.0):
+        self.frames = frames
+        self.speed = speed
+        self.paused = False
+        self.fast = False
+        self.steps = 0
+        self.stopped = False
+        self.done = False
+        self.frame: Optional[Frame] = None
+        self.moves = 0
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        next_time = time.monotonic()
+        for frame in self.frames:
+            with self._cond:
+                while self.paused and self.steps == 0 and not self.stopped:
+                    self._cond.wait()
+                if self.stopped:
+                    return
+                stepping = self.paused
+                if stepping:
+                    self.steps -= 1
+                self.frame = frame
+                self.moves += 1
+                if self.fast or stepping:
+                    next_time = time.monotonic()
+                    continue
+                # no catching up after slow moves
+                next_time = max(next_time + 1 / self.speed, time.monotonic())
+                if self._cond.wait(next_time - time.monotonic()):
+                    # controls changed, don't hold the new setting back
+                    next_time = time.monotonic()
+        self.done = True
+
+    def _control(self, **changes):
+        with self._cond:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._cond.notify_all()
+
+    def toggle_pause(self):
+        self._control(paused=not self.paused, steps=0)
+
+    def step(self):
+        """play one move while paused"""
+        with self._cond:
+            self.paused = True
+            self.steps += 1
+            self._cond.notify_all()
+
+    def toggle_fast(self):
+        self._control(fast=not self.fast)
+
+    def set_speed(self, speed: float):
+        self._control(speed=max(0.5, speed))
+
+    def stop(self):
+        self._control(stopped=True)
+        self._thread.join()
+
+
+def spectate(stdscr, spectator: Spectator, fps: float = 30.0):
+    try:
+        curses.curs_set(0)
+    except curses.error:
+        pass
+    stdscr.timeout(max(1, int(1000 / fps)))
+    renderer = Renderer(stdscr)
+    spectator.start()
+    rate = 0.0
+    rate_moves = 0
+    rate_time = time.monotonic()
+    try:
+        while True:
+            now = time.monotonic()
+            if now - rate_time >= 1.0:
+                rate = (spectator.moves - rate_moves) / (now - rate_time)
+                rate_moves = spectator.moves
+                rate_time = now
+            frame = spectator.frame
+            if frame is not None:
+                if spectator.paused:
+                    mode = "PAUSED"
+                elif spectator.fast:
+                    mode = "FAST FORWARD"
+                elif spectator.done:
+                    mode = "DONE"
+                else:
+                    mode = f"{spectator.speed:g} moves/sec"
+                score = "-" if frame.score is None else frame.score
+                renderer.draw(frame.grid, [
+                    f"Game {frame.game}  Move {frame.iteration}  "
+                    f"Max Value {1 << max(frame.grid)}  Score {score}",
+                    "GAME OVER" if frame.game_over else "",
+                    f"{mode}  (engine {rate:.0f} moves/sec)",
+                    "space pause  n step  f fast-forward  +/- speed  q quit",
+                ])
+            key = stdscr.getch()
+            if key == ord('q'):
+                break
+            elif key == ord(' '):
+                spectator.toggle_pause()
+            elif key == ord('n'):
+                spectator.step()
+            elif key == ord('f'):
+                spectator.toggle_fast()
+            elif key in (ord('+'), ord('=')):
+                spectator.set_speed(spectator.speed * 2)
+            elif key == ord('-'):
+                spectator.set_speed(spectator.speed / 2)
+    finally:
+        spectator.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play 2048 in terminal")
+    parser.add_argument('--trace', default=None,
+                        help="directory to record games to")
+    parser.add_argument('--spectate', choices=list(PLAYERS), default=None,
+                        help="watch a hand-coded player")
+    parser.add_argument('--replay', default=None,
+                        help="watch games recorded to directory")
+    parser.add_argument('--first-game', type=int, default=0,
+                        help="first recorded game to --replay")
+    parser.add_argument('--games', type=int, default=100,
+                        help="games for --spectate to play")
+    parser.add_argument('--speed', type=float, default=10.0,
+                        help="moves/sec when watching")
+    parser.add_argument('--fps', type=float, default=30.0,
+                        help="screen updates/sec when watching")
+    args = parser.parse_args(argv)
+    if args.replay is not None:
+        spectator = Spectator(trace_frames(args.replay, args.first_game),
+                              args.speed)
+        curses.wrapper(spectate, spectator, args.fps)
+        return
+
+    if args.trace is None:
+        writer = None
+        game = Game2048()
+    else:
+        writer = TraceWriter(args.trace)
+        game = TracingGame(writer)
+    if args.spectate is None:
+        curses.wrapper(play, game)
+    else:
+        player = PLAYERS[args.spectate](game)
+        spectator = Spectator(player_frames(player, args.games), args.speed)
+        curses.wrapper(spectate, spectator, args.fps)
+    if writer is not None:
+        game.finish_game()
+        writer.close()
+
+
 if __name__ == "__main__":
-    curses.wrapper(main)
+    main()
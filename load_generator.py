@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+from game2048 import Game2048
+from game_server import GAME_OVER, GameClient, GameServer
+from grid4x4 import Grid4x4
+from players import PLAYERS
+from typing import Dict, List, Optional
+
+
+async def bot_session(client: GameClient, player_name: str, games: int,
+                      max_iterations: int, latencies: List[float],
+                      results: List):
+    """
+    plays games on the server with a hand-coded player, the player picks
+    moves on a local copy of the grid sent back by the server
+    """
+    game = Game2048()
+    player = PLAYERS[player_name](game)
+    for _ in range(games):
+        status, packed, score = await client.new_game()
+        for iteration in range(max_iterations):
+            game.grid = Grid4x4.unpack(packed)
+            direction = player.choose_direction()
+            start = time.perf_counter()
+            status, packed, score = await client.move(direction)
+            latencies.append(time.perf_counter() - start)
+            if status == GAME_OVER:
+                break
+        game.grid = Grid4x4.unpack(packed)
+        results.append((iteration, game.max_value(), score))
+    await client.close()
+
+
+async def run_load(clients: int, games: int, player_name: str = 'random',
+                   max_iterations: int = 1200, host: str = '127.0.0.1',
+                   port: int = 2048, unix: Optional[str] = None,
+                   local: bool = False):
+    """
+    runs clients concurrent bot sessions, with local a GameServer is
+    started in this event loop on an ephemeral port.
+    Returns (latencies, results, elapsed)
+    """
+    server = None
+    if local:
+        server = GameServer()
+        await server.start(host, 0, unix)
+        if unix is None:
+            port = server.server.sockets[0].getsockname()[1]
+    latencies: List[float] = []
+    results: List = []
+    start = time.monotonic()
+    sessions = [await GameClient.connect(host, port, unix)
+                for _ in range(clients)]
+    await asyncio.gather(*[
+        bot_session(client, player_name, games, max_iterations, latencies,
+                    results)
+        for client in sessions])
+    elapsed = time.monotonic() - start
+    if server is not None:
+        server.close()
+    return (latencies, results, elapsed)
+
+
+def latency_percentiles(latencies: List[float]) -> Dict[int, float]:
+    """p50, p90, p99 and p100 of latencies, 0.0 when there are none"""
+    if len(latencies) < 2:
+        # quantiles needs two values
+        cuts = [max(latencies, default=0.0)] * 99
+    else:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    result = {pct: cuts[pct - 1] for pct in (50, 90, 99)}
+    result[100] = max(latencies, default=0.0)
+    return result
+
+
+def print_summary(clients: int, latencies: List[float], results: List,
+                  elapsed: float):
+    print("-"*80)
+    print(f"sessions       {clients}")
+    print(f"games          {len(results)}")
+    print(f"moves          {len(latencies)}")
+    print(f"moves/sec      {len(latencies) / max(elapsed, 1e-9):.0f}")
+    for pct, latency in latency_percentiles(latencies).items():
+        print(f"latency p{pct:<3d}   {latency*1000:.2f} ms")
+    # no results when every session failed
+    mean_score = (sum(r[2] for r in results) / len(results)
+                  if results else 0.0)
+    print(f"mean score     {mean_score:.1f}")
+
+
+def _run_load_process(args):
+    latencies, results, _ = asyncio.run(run_load(*args))
+    return (latencies, results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Play bot sessions against game_server.py")
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--games', type=int, default=1,
+                        help="games per client")
+    parser.add_argument('--player', choices=list(PLAYERS), default='random')
+    parser.add_argument('--max-iterations', type=int, default=1200)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2048)
+    parser.add_argument('--unix', default=None)
+    parser.add_argument('--local', action='store_true',
+                        help="start a server in this process")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="split clients over processes so bot moves "
+                        "don't limit the load")
+    args = parser.parse_args(argv)
+
+    if args.processes == 1:
+        latencies, results, elapsed = asyncio.run(run_load(
+            args.clients, args.games, args.player, args.max_iterations,
+            args.host, args.port, args.unix, args.local))
+    else:
+        if args.local:
+            parser.error("--local needs a single process")
+        tasks = [(len(range(i, args.clients, args.processes)), args.games,
+                  args.player, args.max_iterations, args.host, args.port,
+                  args.unix)
+                 for i in range(args.processes)]
+        latencies = []
+        results = []
+        start = time.monotonic()
+        with multiprocessing.Pool(args.processes) as pool:
+            for process_latencies, process_results in pool.imap_unordered(
+                    _run_load_process, tasks):
+                latencies += process_latencies
+                results += process_results
+        elapsed = time.monotonic() - start
+    print_summary(args.clients, latencies, results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
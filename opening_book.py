@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import multiprocessing
+import struct
+import sys
+import time
+from array import array
+from itertools import combinations, product
+from typing import Dict, Optional
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from players import PlayerExpectimax
+
+
+class OpeningBook:
+    """
+    Best move for early-game positions, keyed by canonical packed grid.
+
+    File format (little-endian):
+        8 byte magic, uint32 version, uint32 search depth, uint32 count,
+        count uint64 canonical grids, count uint8 move indexes into "LDUR"
+    """
+
+    MAGIC = b'2048BOOK'
+    VERSION = 1
+    HEADER = struct.Struct('<8sIII')
+
+    def __init__(self, moves: Optional[Dict[int, str]] = None,
+                 depth: int = 0):
+        # canonical packed grid -> direction on canonical grid
+        self.moves = {} if moves is None else moves
+        self.depth = depth
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def lookup(self, grid: Grid4x4) -> Optional[str]:
+        """book direction for grid, or None if grid is not in book"""
+        packed, flip = grid.canonical()
+        canonical_direction = self.moves.get(packed)
+        if canonical_direction is None:
+            return None
+        for direction in "LDUR":
+            if Grid4x4.flip_direction(direction, *flip) == canonical_direction:
+                return direction
+        raise RuntimeError(f"no direction for {canonical_direction}")
+
+    def save(self, path: str):
+        keys = array('Q', sorted(self.moves))
+        if keys.itemsize != 8:
+            raise RuntimeError("array 'Q' is not 64-bit")
+        moves = bytes("LDUR".index(self.moves[k]) for k in keys)
+        if sys.byteorder == 'big':
+            keys.byteswap()
+        with open(path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.depth,
+                                     len(keys)))
+            keys.tofile(f)
+            f.write(moves)
+
+    @classmethod
+    def load(cls, path: str) -> 'OpeningBook':
+        with open(path, 'rb') as f:
+            magic, version, depth, count = cls.HEADER.unpack(
+                f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise RuntimeError(f"{path} is not an opening book")
+            keys = array('Q')
+            keys.fromfile(f, count)
+            moves = f.read(count)
+        if sys.byteorder == 'big':
+            keys.byteswap()
+        return cls(dict(zip(keys, ("LDUR"[m] for m in moves))), depth)
+
+
+def reset_positions():
+    """canonical packed grids for every grid Game2048.reset() can make"""
+    positions = set()
+    for i, j in combinations(range(16), 2):
+        for vi, vj in product((1, 2), repeat=2):
+            grid = Grid4x4()
+            grid._grid[i] = vi
+            grid._grid[j] = vj
+            positions.add(grid.canonical()[0])
+    return positions
+
+
+# search player owned by each pool worker, created by _init_worker
+_worker_player = None
+
+
+def _init_worker(depth):
+    global _worker_player
+    _worker_player = PlayerExpectimax(Game2048(), depth=depth)
+
+
+def _solve(packed):
+    _worker_player.game.grid = Grid4x4.unpack(packed)
+    return (packed, _worker_player.choose_direction())
+
+
+def build_book(plies: int, depth: int, processes: int) -> OpeningBook:
+    """
+    Search every position reachable in the first plies moves, when the
+    book move is always played, and record best move for each position.
+    """
+    book = OpeningBook(depth=depth)
+    positions = reset_positions()
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(depth,)) as pool:
+        for ply in range(plies):
+            start = time.monotonic()
+            next_positions = set()
+            for packed, direction in pool.imap_unordered(
+                    _solve, positions, chunksize=4):
+                book.moves[packed] = direction
+                game = Game2048(Grid4x4.unpack(packed))
+                game.slide(direction)
+                for i, v in enumerate(game.grid._grid):
+                    if v != 0:
+                        continue
+                    for new_v in (1, 2):
+                        game.grid._grid[i] = new_v
+                        next_positions.add(game.grid.canonical()[0])
+                    game.grid._grid[i] = 0
+            print(f"ply {ply} : {len(positions)} positions "
+                  f"{time.monotonic() - start:.1f} sec")
+            # tile sums overlap between plies, skip already solved grids
+            positions = next_positions.difference(book.moves)
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve early-game positions into an opening book")
+    parser.add_argument('--plies', type=int, default=2,
+                        help="number of moves from reset covered by book")
+    parser.add_argument('--depth', type=int, default=2,
+                        help="expectimax search depth")
+    parser.add_argument('--processes', type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument('--out', default='opening_book.bin')
+    args = parser.parse_args()
+
+    book = build_book(args.plies, args.depth, args.processes)
+    book.save(args.out)
+    print(f"wrote {len(book)} positions to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import multiprocessing
+import multiprocessing.util
+import time
+from game2048 import Game2048
+from game_trace import TraceWriter, TracingGame
+from grid4x4 import Grid4x4
+from opening_book import OpeningBook
+from players import PlayerExpectimax, PlayerMaxScore, SearchTimeout
+from position_cache import PositionCache
+
+
+# search player owned by each pool worker, created by _init_worker
+_worker_player = None
+
+
+def _init_worker(player_cls, cache_path):
+    global _worker_player
+    _worker_player = player_cls(Game2048())
+    if cache_path is not None:
+        # sqlite connections can't be shared with a forked process
+        _worker_player.cache = PositionCache(cache_path)
+        # write buffered values when the worker exits after pool.close()
+        multiprocessing.util.Finalize(_worker_player.cache,
+                                      _worker_player.cache.close,
+                                      exitpriority=10)
+
+
+def _search_direction(grid_vals, direction, deadline, max_depth):
+    """
+    Iterative deepening search of a single root move in a pool worker.
+    Returns (direction, values, nodes) where values[d-1] is the value of
+    the move searched to depth d, for every depth finished before deadline.
+    Values are None when the slide does not change the grid.
+    """
+    player = _worker_player
+    player.game.grid = Grid4x4()
+    player.game.grid._grid = grid_vals
+    player.nodes = 0
+    player.deadline = deadline
+    values = []
+    try:
+        for depth in range(1, max_depth + 1):
+            value = player.move_value(direction, depth)
+            values.append(value)
+            if value is None:
+                break
+    except SearchTimeout:
+        pass
+    finally:
+        player.deadline = None
+    return (direction, values, player.nodes)
+
+
+class PlayerRootParallel:
+    """
+    Wraps a search player (PlayerExpectimax or subclass) so that each root
+    move is searched by a persistent pool of processes.  Every move is
+    answered within budget seconds, using the deepest search that finished
+    for all valid root moves.  With fewer processes than valid moves, the
+    budget is split into a time slice for each round of moves.  A move
+    that could not finish even depth 1 is ranked below the others.
+
+    Stats for last move are stored in last_stats.  With cache_path, workers
+    share a PositionCache file so repeated positions are not searched again.
+    Positions in optional book (OpeningBook) are answered without searching.
+    """
+
+    def __init__(self, game, player_cls=PlayerExpectimax, budget=0.1,
+                 max_depth=8, processes=4, cache_path=None, book=None):
+        self.game = game
+        self.player = player_cls(game)
+        self.book = book
+        self.budget = budget
+        self.max_depth = max_depth
+        # time reserved for sending results back to this process, and
+        # again for choosing a move once they are in
+        self.margin = min(0.01, 0.1 * budget)
+        self.processes = processes
+        self.pool = multiprocessing.Pool(processes,
+                                         initializer=_init_worker,
+                                         initargs=(player_cls, cache_path))
+        self.last_stats = None
+
+    def close(self):
+        # searches left over from the last move stop at their deadline,
+        # then workers exit and flush their caches
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def choose_direction(self):
+        start = time.monotonic()
+        if self.book is not None:
+            direction = self.book.lookup(self.game.grid)
+            if direction is not None:
+                elapsed = time.monotonic() - start
+                self.last_stats = {'depth': self.book.depth,
+                                   'max_depth': self.book.depth, 'nodes': 0,
+                                   'nodes_per_sec': 0.0, 'elapsed': elapsed}
+                return direction
+        deadline = start + self.budget
+        grid_vals = self.game.grid._grid[:]
+        valid = []
+        for direction in "LDUR":
+            scratch = Game2048(self.game.grid)
+            scratch.slide(direction)
+            if scratch.grid._grid != grid_vals:
+                valid.append(direction)
+        # CLOCK_MONOTONIC is shared between processes on the same machine,
+        # so workers stop at the same deadlines.  The pool hands out tasks
+        # in order, so with fewer processes than moves each round of tasks
+        # starts as the one before it reaches its deadline.
+        search_end = deadline - 2 * self.margin
+        rounds = -(-len(valid) // self.processes)
+        pending = []
+        for i, direction in enumerate(valid):
+            round_end = start + (search_end - start) * (
+                i // self.processes + 1) / rounds
+            pending.append(self.pool.apply_async(
+                _search_direction,
+                (grid_vals, direction, round_end, self.max_depth)))
+        results = {}
+        nodes = 0
+        for async_result in pending:
+            timeout = max(0.0, deadline - self.margin - time.monotonic())
+            try:
+                direction, values, move_nodes = async_result.get(timeout)
+            except multiprocessing.TimeoutError:
+                continue
+            results[direction] = values
+            nodes += move_nodes
+
+        # compare moves at the deepest depth all of them finished, moves
+        # without any finished depth are ranked last
+        finished = {d: v for d, v in results.items() if len(v) > 0}
+        depth = min((len(v) for v in finished.values()), default=0)
+        if depth > 0:
+            best_direction = max(finished,
+                                 key=lambda d: finished[d][depth-1])
+        elif len(valid) == 0:
+            # no slide changes the grid
+            best_direction = "L"
+        else:
+            # nothing finished in time, fall back to a 1-step greedy move
+            best_direction = PlayerMaxScore.choose_direction(self.player)
+
+        elapsed = time.monotonic() - start
+        self.last_stats = {
+            'depth': depth,
+            'max_depth': max((len(v) for v in results.values()), default=0),
+            'nodes': nodes,
+            'nodes_per_sec': nodes / elapsed if elapsed > 0 else 0.0,
+            'elapsed': elapsed,
+        }
+        return best_direction
+
+    def run(self, max_iterations):
+        self.game.reset()
+        for iteration in range(max_iterations):
+            direction = self.choose_direction()
+            self.game.slide(direction)
+            if not self.game.add_tile():
+                break
+        max_value = self.game.max_value()
+        return (iteration, max_value)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play games with root-parallel expectimax search")
+    parser.add_argument('--budget', type=float, default=0.1,
+                        help="seconds allowed per move")
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--max-depth', type=int, default=8)
+    parser.add_argument('--games', type=int, default=1)
+    parser.add_argument('--max-iterations', type=int, default=1200)
+    parser.add_argument('--cache', default=None,
+                        help="sqlite file to store searched position values")
+    parser.add_argument('--book', default=None,
+                        help="opening book written by opening_book.py")
+    parser.add_argument('--trace', default=None,
+                        help="directory to record games to")
+    args = parser.parse_args()
+    book = None if args.book is None else OpeningBook.load(args.book)
+
+    if args.trace is None:
+        writer = None
+        game = Game2048()
+    else:
+        writer = TraceWriter(args.trace)
+        game = TracingGame(writer)
+    latencies = []
+    depths = []
+    nps = []
+    with PlayerRootParallel(game, budget=args.budget,
+                            max_depth=args.max_depth,
+                            processes=args.processes,
+                            cache_path=args.cache,
+                            book=book) as player:
+        for trial in range(args.games):
+            game.reset()
+            for iteration in range(args.max_iterations):
+                direction = player.choose_direction()
+                stats = player.last_stats
+                latencies.append(stats['elapsed'])
+                depths.append(stats['depth'])
+                nps.append(stats['nodes_per_sec'])
+                game.slide(direction)
+                if not game.add_tile():
+                    break
+            print(f"game {trial} : iterations {iteration} "
+                  f"max value {game.max_value()}")
+    if writer is not None:
+        game.finish_game()
+        writer.close()
+
+    print("-"*80)
+    print(f"moves          {len(latencies)}")
+    for pct in (50, 90, 99, 100):
+        print(f"latency p{pct:<3d}   {percentile(latencies, pct)*1000:.1f} ms")
+    print(f"depth avg      {sum(depths)/len(depths):.2f}")
+    print(f"depth min      {min(depths)}")
+    print(f"nodes/sec avg  {sum(nps)/len(nps):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,20 +22,26 @@
 
 
 from game2048 import Game2048
+from game_trace import TraceWriter, TracingGame
+from grid4x4 import Grid4x4
+import argparse
 import math
 import random
-import numpy as np
+import statistics
+import time
 
 
 class PlayerRandom:
     def __init__(self, game):
         self.game = game
 
+    def choose_direction(self):
+        return random.choice("LDUR")
+
     def run(self, max_iterations):
         self.game.reset()
-        directions = "LDUR"
         for iteration in range(max_iterations):
-            direction = random.choice(directions)
+            direction = self.choose_direction()
             self.game.slide(direction)
             if not self.game.add_tile():
                 break
@@ -53,21 +59,24 @@ class PlayerMaxScore:
             score += (1 << v)**2
         return math.sqrt(score)
 
+    def choose_direction(self):
+        best_score = 0
+        best_direction = None
+        checkpoint = self.game.save()
+        for direction in "LDUR":
+            self.game.slide(direction)
+            score = self.get_score()
+            if score > best_score:
+                best_score = score
+                best_direction = direction
+            self.game.restore(checkpoint)
+        return best_direction
+
     def run(self, max_iterations):
         self.game.reset()
-        directions = "LDUR"
         for iteration in range(max_iterations):
-            best_score = 0
-            best_direction = None
-            checkpoint = self.game.save()
-            for direction in directions:
-                self.game.slide(direction)
-                score = self.get_score()
-                if score > best_score:
-                    best_score = score
-                    best_direction = direction
-                self.game.restore(checkpoint)
-            self.game.slide(best_direction)
+            direction = self.choose_direction()
+            self.game.slide(direction)
             if not self.game.add_tile():
                 break
         max_value = self.game.max_value()
@@ -94,13 +103,224 @@ class PlayerCorner(PlayerMaxScore):
         return score
 
 
-def main():
-    game = Game2048()
+class SearchTimeout(Exception):
+    pass
+
+
+class PlayerExpectimax(PlayerCorner):
+    """
+    Depth-limited expectimax over slides and new tiles.
+    Leaf positions are scored with the PlayerCorner heuristic.
+    Depth counts the number of random tile placements searched.
+
+    Optional cache (see position_cache.PositionCache) stores values of
+    positions searched at least cache_min_depth deep.
+    Optional book (see opening_book.OpeningBook) is used instead of searching
+    positions that it contains.
+    """
+
+    def __init__(self, game, depth=2, cache=None, cache_min_depth=2,
+                 book=None):
+        self.game = game
+        self.depth = depth
+        self.book = book
+        self.cache = cache
+        self.cache_min_depth = cache_min_depth
+        self.nodes = 0
+        # time.monotonic() value at which search is abandoned
+        self.deadline = None
+
+    def move_value(self, direction, depth):
+        """
+        Expected value of sliding in direction
+        Returns None if the slide does not change the grid
+        """
+        checkpoint = self.game.save()
+        self.game.slide(direction)
+        if self.game.grid._grid == checkpoint['grid']:
+            value = None
+        else:
+            value = self.chance_value(depth)
+        self.game.restore(checkpoint)
+        return value
+
+    def best_value(self, depth):
+        self.nodes += 1
+        if depth == 0:
+            return self.get_score()
+        best_value = 0.0
+        for direction in "LDUR":
+            value = self.move_value(direction, depth)
+            if value is not None and value > best_value:
+                best_value = value
+        return best_value
+
+    def chance_value(self, depth):
+        self.nodes += 1
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+        grid = self.game.grid
+        open_idxs = [i for i, v in enumerate(grid._grid) if v == 0]
+        if len(open_idxs) == 0:
+            # add_tile would fail, game is over
+            return 0.0
+        key = None
+        if self.cache is not None and depth >= self.cache_min_depth:
+            # value is the same for every flip of grid
+            key, _ = grid.canonical()
+            value = self.cache.get(key, depth)
+            if value is not None:
+                return value
+        value = 0.0
+        for i in open_idxs:
+            # 10% chance of a 4 instead of a 2
+            for v, prob in ((1, 0.9), (2, 0.1)):
+                grid._grid[i] = v
+                value += prob * self.best_value(depth - 1)
+            grid._grid[i] = 0
+        value /= len(open_idxs)
+        if key is not None:
+            self.cache.put(key, value, depth)
+        return value
+
+    def choose_direction(self):
+        if self.book is not None:
+            direction = self.book.lookup(self.game.grid)
+            if direction is not None:
+                return direction
+        best_value = None
+        best_direction = "L"
+        for direction in "LDUR":
+            value = self.move_value(direction, self.depth)
+            if value is not None and (best_value is None or
+                                      value > best_value):
+                best_value = value
+                best_direction = direction
+        return best_direction
+
+
+class PlayerPolicy(PlayerRandom):
+    """
+    Plays moves chosen by a learned policy.
+    act(obs) takes an observation (encoded by grid_batch.OBSERVATIONS[
+    observation]) and returns an index into "LDUR".  With canonicalize, the
+    policy sees the grid after heavy_side_flip() like gym_env.Environment5
+    and later.
+    """
+
+    def __init__(self, game, act, canonicalize=True, observation='one_hot'):
+        # numpy is only needed by learned players
+        from grid_batch import OBSERVATIONS
+        self.game = game
+        self.act = act
+        self.canonicalize = canonicalize
+        self.observe = OBSERVATIONS[observation]
+
+    def choose_direction(self):
+        grid = self.game.grid
+        flip = (False, False, False)
+        if self.canonicalize:
+            flip = grid.heavy_side_flip_args()
+            grid = grid.flip(*flip)
+        obs = self.observe([grid._grid])[0]
+        flipped_direction = "LDUR"[self.act(obs)]
+        for direction in "LDUR":
+            if Grid4x4.flip_direction(direction, *flip) == flipped_direction:
+                return direction
+
+
+class PlayerDQN(PlayerPolicy):
+    """
+    Plays greedy moves from DQN weights exported with dqn_numpy.export_dqn,
+    without importing torch
+    """
+
+    def __init__(self, game, weights_path, canonicalize=True):
+        from dqn_numpy import NumpyDQN
+        self.model = NumpyDQN.load(weights_path)
+        super().__init__(game, self.best_action, canonicalize,
+                         self.model.observation)
+
+    def best_action(self, obs):
+        return int(self.model(obs).argmax())
+
+
+PLAYERS = {
+    'random': PlayerRandom,
+    'max_score': PlayerMaxScore,
+    'corner': PlayerCorner,
+    'expectimax': PlayerExpectimax,
+}
+
+
+def print_results(player_results):
+    """table of iterations and max values for name -> [(iter, raw), ...]"""
+    print("-"*80)
+    print(f"{'name':<20s} {'iter':<10} {'raw':<10} {'value':<10}")
+    print("-"*80)
+    stats = {'mean': statistics.mean, 'max': max}
+    for name, results in player_results.items():
+        iters = []
+        raws = []
+        vals = []
+        for trial, (iter, raw) in enumerate(results):
+            iters.append(iter)
+            raws.append(raw)
+            vals.append(1 << raw)
+
+        print(f"{name:<20s}")
+        for stat, func in stats.items():
+            msg = f"    {stat:<20s}"
+            for arr in (iters, raws, vals):
+                v = func(arr)
+                msg += f" {v:<10.2f}"
+            print(msg)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare 2048 players")
+    parser.add_argument('--trace', default=None,
+                        help="directory to record games to")
+    parser.add_argument('--compare', nargs=2, metavar='NAME',
+                        choices=list(PLAYERS),
+                        help="play two players on the same seeds until a "
+                        "sequential test decides which is better")
+    parser.add_argument('--metric', default='max_tile',
+                        help="max_tile, iterations, or reach_N (e.g. "
+                        "reach_2048) for --compare")
+    parser.add_argument('--method', choices=('sprt', 'ci'), default='sprt')
+    parser.add_argument('--alpha', type=float, default=0.05,
+                        help="error rate of the --compare decision")
+    parser.add_argument('--delta', type=float, default=0.1,
+                        help="sprt indifference, A wins 0.5 +/- delta of "
+                        "decisive pairs")
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.compare is not None:
+        from tournament import compare_players, print_comparison
+        name_a, name_b = args.compare
+        decision, test, pairs = compare_players(
+            name_a, name_b, args.metric, args.method, args.alpha, args.delta,
+            args.max_games, args.processes)
+        print_results({name_a + " (A)": [a for a, _ in pairs],
+                       name_b + " (B)": [b for _, b in pairs]})
+        print_comparison(name_a, name_b, args.metric, decision, test, pairs)
+        return
+
+    if args.trace is None:
+        writer = None
+        game = Game2048()
+    else:
+        writer = TraceWriter(args.trace)
+        game = TracingGame(writer)
     debug = False
     players = {
         'random': PlayerRandom(game),
         'max_score': PlayerMaxScore(game),
         'corner': PlayerCorner(game),
+        'expectimax': PlayerExpectimax(game, depth=1),
     }
     max_iterations = 1200
     player_results = {}
@@ -116,29 +336,11 @@ def main():
                 if trial % 100 == 0:
                     print(f"{name} : trial {trial}")
         player_results[name] = results
+    if writer is not None:
+        game.finish_game()
+        writer.close()
 
-    print("-"*80)
-    print(f"{'name':<20s} {'iter':<10} {'raw':<10} {'value':<10}")
-    print("-"*80)
-    for name, results in player_results.items():
-        iters = []
-        raws = []
-        vals = []
-        for trial, (iter, raw) in enumerate(results):
-            iters.append(iter)
-            raws.append(raw)
-            vals.append(1 << raw)
-        iters = np.array(iters)
-        raws = np.array(raws)
-        vals = np.array(vals)
-
-        print(f"{name:<20s}")
-        for stat in ('mean', 'max'):
-            msg = f"    {stat:<20s}"
-            for arr in (iters, raws, vals):
-                v = getattr(arr, stat)()
-                msg += f" {v:<10.2f}"
-            print(msg)
+    print_results(player_results)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sqlite3
+import time
+from typing import Dict, Optional, Tuple
+
+
+def _to_signed(packed: int) -> int:
+    # sqlite integers are signed 64-bit
+    return packed - (1 << 64) if packed >= (1 << 63) else packed
+
+
+class PositionCache:
+    """
+    Persistent store of searched position values, keyed by the canonical
+    packed grid (see Grid4x4.canonical).  Each value records the search
+    depth it came from, a lookup only hits if the stored depth is at
+    least as deep as requested.
+
+    Backed by sqlite in WAL mode so several worker processes can read while
+    one writes.  New values are buffered in memory and written in a single
+    transaction by flush(), which also evicts the shallowest (then oldest)
+    positions once there are more than max_entries.  flush() is called
+    every flush_every new values and by close(), so the row count is only
+    checked once per batch, counting rows written by every process.
+
+    Values depend on the player heuristic, use a separate file per player.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000000,
+                 flush_every: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[int, Tuple[float, int]] = {}
+        self._conn = sqlite3.connect(path, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS positions ("
+                " grid INTEGER PRIMARY KEY,"
+                " value REAL NOT NULL,"
+                " depth INTEGER NOT NULL,"
+                " updated REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS positions_evict"
+                " ON positions (depth, updated)")
+
+    def get(self, packed: int, depth: int) -> Optional[float]:
+        """value of canonical packed grid searched to at least depth"""
+        pending = self._pending.get(packed)
+        if pending is not None and pending[1] >= depth:
+            self.hits += 1
+            return pending[0]
+        row = self._conn.execute(
+            "SELECT value FROM positions WHERE grid = ? AND depth >= ?",
+            (_to_signed(packed), depth)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, packed: int, value: float, depth: int):
+        pending = self._pending.get(packed)
+        if pending is None or pending[1] <= depth:
+            self._pending[packed] = (value, depth)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if len(self._pending) == 0:
+            return
+        now = time.time()
+        rows = [(_to_signed(packed), value, depth, now)
+                for packed, (value, depth) in self._pending.items()]
+        self._pending.clear()
+        with self._conn:
+            # keep existing value if it came from a deeper search
+            self._conn.executemany(
+                "INSERT INTO positions (grid, value, depth, updated)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (grid) DO UPDATE SET"
+                " value = excluded.value,"
+                " depth = excluded.depth,"
+                " updated = excluded.updated"
+                " WHERE excluded.depth >= positions.depth", rows)
+            # rows written by other processes count too
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM positions").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM positions WHERE grid IN"
+                    " (SELECT grid FROM positions"
+                    " ORDER BY depth, updated LIMIT ?)",
+                    (count - self.max_entries,))
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
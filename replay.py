@@ -0,0 +1,100 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from typing import Dict, Optional
+from grid_batch import flip_actions, flip_grids, unpack_grids
+
+
+class ReplayBuffer:
+    """
+    Fixed capacity replay memory of (grid, action, reward, next grid)
+    transitions, with grids stored packed (see Grid4x4.pack).
+
+    With augment, sample() applies a random flip / rotation to each sampled
+    transition (grids and action together) so one stored transition covers
+    all 8 symmetric versions, without the environment folding grids with
+    heavy_side_flip() on every step.
+    """
+
+    def __init__(self, capacity: int,
+                 rng: Optional[np.random.Generator] = None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.grid = np.zeros(capacity, dtype=np.uint64)
+        self.action = np.zeros(capacity, dtype=np.uint8)
+        self.reward = np.zeros(capacity, dtype=np.float32)
+        self.next_grid = np.zeros(capacity, dtype=np.uint64)
+        self.done = np.zeros(capacity, dtype=bool)
+        self.position = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, grid: int, action: int, reward: float,
+             next_grid: Optional[int]):
+        """Save a transition, next_grid is None when episode terminated"""
+        i = self.position
+        self.grid[i] = grid
+        self.action[i] = action
+        self.reward[i] = reward
+        self.next_grid[i] = 0 if next_grid is None else next_grid
+        self.done[i] = next_grid is None
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, grids: np.ndarray, actions: np.ndarray,
+                   rewards: np.ndarray, next_grids: np.ndarray,
+                   dones: np.ndarray):
+        """Save arrays of transitions (packed grids)"""
+        idxs = (self.position + np.arange(len(grids))) % self.capacity
+        self.grid[idxs] = grids
+        self.action[idxs] = actions
+        self.reward[idxs] = rewards
+        self.next_grid[idxs] = np.where(dones, 0, next_grids)
+        self.done[idxs] = dones
+        self.position = int((self.position + len(grids)) % self.capacity)
+        self.size = min(self.size + len(grids), self.capacity)
+
+    def sample(self, batch_size: int,
+               augment: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Random batch of transitions with grids unpacked to (B,16) arrays.
+        Next grid of terminated transitions is all zeros.
+        """
+        idxs = self.rng.integers(self.size, size=batch_size)
+        grid = unpack_grids(self.grid[idxs])
+        action = self.action[idxs].astype(np.intp)
+        next_grid = unpack_grids(self.next_grid[idxs])
+        if augment:
+            flips = self.rng.integers(8, size=batch_size)
+            grid = flip_grids(grid, flips)
+            next_grid = flip_grids(next_grid, flips)
+            action = flip_actions(action, flips)
+        return {
+            'grid': grid,
+            'action': action,
+            'reward': self.reward[idxs],
+            'next_grid': next_grid,
+            'done': self.done[idxs],
+        }
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Single entry point for the 2048 tools.  Each command's module is only
+# imported when that command runs, so the lightweight commands never load
+# numpy, torch, or gymnasium.
+
+import argparse
+import importlib
+import sys
+
+COMMANDS = {
+    'play': ('interactive2048', "play in the terminal"),
+    'tournament': ('players', "compare hand-coded players"),
+    'train': ('dqn_train', "train a Deep-Q player (needs torch)"),
+    'sweep': ('sweep', "parallel hyperparameter sweep (needs torch)"),
+    'bench': ('bench', "measure import, engine and process pool times"),
+    'evaluate': ('evaluate', "evaluate trained policies (needs numpy)"),
+    'serve': ('game_server', "host many games over TCP or a Unix socket"),
+    'tablebase': ('tablebase', "build an endgame tablebase (needs numpy)"),
+}
+
+
+def main(argv=None):
+    epilog = "\n".join(f"  {name:<12s} {help}"
+                       for name, (_, help) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog="rl2048", description="2048 game, players and training",
+        epilog="commands:\n" + epilog,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=list(COMMANDS))
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help="arguments for command, see COMMAND --help")
+    args = parser.parse_args(argv)
+    module = importlib.import_module(COMMANDS[args.command][0])
+    return module.main(args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Hyperparameter sweep of dqn_train.py runs with successive halving, see
+# doc/deep_q/deep_q.md
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from typing import Dict, List
+
+# keys and value types of dqn_train.DEFAULT_CONFIG, repeated here so the
+# sweep process doesn't import torch before forking workers
+CONFIG_TYPES = {
+    'env': str, 'batch_size': int, 'gamma': float, 'eps_start': float,
+    'eps_end': float, 'eps_decay': int, 'tau': float, 'lr': float,
+    'memory': int, 'hidden': int, 'augment': bool, 'novelty': float,
+    'seed': int,
+}
+
+
+def parse_value(key: str, text: str):
+    if key not in CONFIG_TYPES:
+        raise ValueError(f"unknown config key {key}")
+    value_type = CONFIG_TYPES[key]
+    if value_type is bool:
+        return text.lower() in ('1', 'true', 'yes')
+    return value_type(text)
+
+
+def sample_value(key: str, spec):
+    """
+    random value for spec ["uniform", low, high], ["log_uniform", low,
+    high], ["int_uniform", low, high], or ["choice", [values...]]
+    """
+    kind = spec[0]
+    if kind == 'uniform':
+        value = random.uniform(spec[1], spec[2])
+    elif kind == 'log_uniform':
+        value = math.exp(random.uniform(math.log(spec[1]),
+                                        math.log(spec[2])))
+    elif kind == 'int_uniform':
+        # randint needs int bounds, json may give floats like 64.0
+        value = random.randint(int(spec[1]), int(spec[2]))
+    elif kind == 'choice':
+        value = random.choice(spec[1])
+    else:
+        raise ValueError(f"unknown distribution {kind} for {key}")
+    return CONFIG_TYPES[key](value)
+
+
+def make_configs(spec: Dict, seed: int = 0) -> List[Dict]:
+    """
+    Every combination of spec['grid'] values, each combined with
+    spec['samples'] (default 1) random draws of spec['random'], on top of
+    spec['base']
+    """
+    random.seed(seed)
+    grid = spec.get('grid', {})
+    keys = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        for _ in range(spec.get('samples', 1)):
+            config = dict(spec.get('base', {}))
+            config.update(zip(keys, values))
+            for key, dist in spec.get('random', {}).items():
+                config[key] = sample_value(key, dist)
+            configs.append(config)
+    return configs
+
+
+def rungs(min_episodes: int, max_episodes: int, eta: int) -> List[int]:
+    """episode counts at which runs are compared and the worst are stopped"""
+    result = []
+    episodes = min_episodes
+    while episodes < max_episodes:
+        result.append(episodes)
+        episodes *= eta
+    result.append(max_episodes)
+    return result
+
+
+def _init_worker(threads):
+    # cap threads of each run so runs don't compete for cores
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['MKL_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+
+def _train_run(task):
+    """
+    Train run in run_dir to episodes, resuming from its checkpoint.
+    Returns (run_dir, score) where score is the average duration of the
+    last window episodes
+    """
+    run_dir, episodes, window, checkpoint_every = task
+    import torch
+    from dqn_train import Checkpointer, Trainer, load_checkpoint
+    with open(os.path.join(run_dir, 'config.json')) as f:
+        config = json.load(f)
+    path = os.path.join(run_dir, 'checkpoint.pt')
+    trainer = Trainer(config, torch.device('cpu'))
+    if os.path.exists(path):
+        trainer.load_state_dict(load_checkpoint(path))
+    with Checkpointer(path, verbose=False) as checkpointer, \
+            open(os.path.join(run_dir, 'metrics.jsonl'), 'a') as metrics:
+        trainer.train(episodes, report_every=min(100, episodes),
+                      checkpointer=checkpointer,
+                      checkpoint_every=checkpoint_every,
+                      metrics_file=metrics, verbose=False)
+    # a resumed run may already be past this rung
+    durations = trainer.episode_durations[:episodes][-window:]
+    return (run_dir, sum(durations) / len(durations))
+
+
+def run_sweep(configs: List[Dict], out_dir: str, min_episodes: int = 1000,
+              max_episodes: int = 10000, eta: int = 3, threads: int = 1,
+              processes: int = None, window: int = 100,
+              checkpoint_every: int = 1000, verbose: bool = True):
+    """
+    Successive halving : every run is trained to the first rung, then only
+    the best 1/eta (by average duration) continue to the next rung, and so
+    on up to max_episodes.  Runs of a rung train in parallel, each resuming
+    from its checkpoint in out_dir/run_NNN, so an interrupted sweep
+    continues when run again.  Returns list of run records.
+    """
+    if processes is None:
+        processes = max(1, multiprocessing.cpu_count() // threads)
+    os.makedirs(out_dir, exist_ok=True)
+    runs = []
+    for i, config in enumerate(configs):
+        run_dir = os.path.join(out_dir, f"run_{i:03d}")
+        os.makedirs(run_dir, exist_ok=True)
+        config_path = os.path.join(run_dir, 'config.json')
+        if os.path.exists(config_path):
+            # resumed sweep keeps the configs it started with
+            with open(config_path) as f:
+                config = json.load(f)
+        else:
+            with open(config_path, 'w') as f:
+                json.dump(config, f, indent=1)
+        runs.append({'run': run_dir, 'config': config, 'episodes': 0,
+                     'score': None, 'stopped': False})
+
+    by_dir = {run['run']: run for run in runs}
+    alive = list(runs)
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(threads,)) as pool, \
+            open(os.path.join(out_dir, 'sweep.jsonl'), 'a') as log:
+        for rung, episodes in enumerate(rungs(min_episodes, max_episodes,
+                                              eta)):
+            start = time.monotonic()
+            tasks = [(run['run'], episodes, window, checkpoint_every)
+                     for run in alive]
+            for run_dir, score in pool.imap_unordered(_train_run, tasks):
+                run = by_dir[run_dir]
+                run['episodes'] = episodes
+                run['score'] = score
+                log.write(json.dumps({'rung': rung, **run}) + "\n")
+                log.flush()
+            alive.sort(key=lambda run: run['score'], reverse=True)
+            if verbose:
+                print(f"rung {rung} : {len(alive)} runs to {episodes} "
+                      f"episodes in {time.monotonic() - start:.0f} sec, "
+                      f"best {alive[0]['score']:.1f} ({alive[0]['run']})")
+            if episodes == max_episodes:
+                break
+            keep = max(1, len(alive) // eta)
+            for run in alive[keep:]:
+                run['stopped'] = True
+            alive = alive[:keep]
+    return runs
+
+
+def print_leaderboard(runs: List[Dict], top: int = 10):
+    runs = sorted(runs, key=lambda run: (run['episodes'], run['score']),
+                  reverse=True)
+    print("-"*80)
+    print(f"{'run':<24s} {'episodes':<10} {'avg dur':<10} config")
+    print("-"*80)
+    for run in runs[:top]:
+        config = " ".join(f"{k}={v}" for k, v in run['config'].items())
+        print(f"{os.path.basename(run['run']):<24s} {run['episodes']:<10d} "
+              f"{run['score']:<10.1f} {config}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Parallel dqn_train.py sweep with successive halving")
+    parser.add_argument('--spec', default=None,
+                        help="json file with base, grid, random and samples")
+    parser.add_argument('--grid', action='append', default=[],
+                        metavar='KEY=V1,V2', help="values to try for KEY")
+    parser.add_argument('--random', action='append', default=[],
+                        metavar='KEY=DIST:LOW:HIGH',
+                        help="DIST is uniform, log_uniform or int_uniform")
+    parser.add_argument('--samples', type=int, default=None,
+                        help="random draws per grid combination")
+    parser.add_argument('--out', default='sweep')
+    parser.add_argument('--min-episodes', type=int, default=1000)
+    parser.add_argument('--max-episodes', type=int, default=10000)
+    parser.add_argument('--eta', type=int, default=3,
+                        help="keep best 1/eta runs at each rung")
+    parser.add_argument('--threads', type=int, default=1,
+                        help="torch threads per run")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="parallel runs, default cores / threads")
+    parser.add_argument('--window', type=int, default=100,
+                        help="episodes averaged to score a run")
+    parser.add_argument('--checkpoint-every', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed for drawing random configs")
+    args = parser.parse_args(argv)
+
+    spec = {}
+    if args.spec is not None:
+        with open(args.spec) as f:
+            spec = json.load(f)
+    for item in args.grid:
+        key, values = item.split('=', 1)
+        spec.setdefault('grid', {})[key] = [parse_value(key, v)
+                                            for v in values.split(',')]
+    for item in args.random:
+        key, dist = item.split('=', 1)
+        kind, low, high = dist.split(':')
+        bound = int if kind == 'int_uniform' else float
+        spec.setdefault('random', {})[key] = [kind, bound(low), bound(high)]
+    if args.samples is not None:
+        spec['samples'] = args.samples
+
+    configs = make_configs(spec, args.seed)
+    print(f"{len(configs)} configs")
+    runs = run_sweep(configs, args.out, args.min_episodes, args.max_episodes,
+                     args.eta, args.threads, args.processes, args.window,
+                     args.checkpoint_every)
+    print_leaderboard(runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from array import array
+import numpy as np
+from batch2048 import slide_grids
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from players import PlayerExpectimax
+
+# Endgame tablebase : for every grid whose tiles are all at most cap, the
+# exact expected merge score (as returned by Game2048.slide) with best play
+# until the game is over or a tile above cap is made.  The slide that makes
+# a tile above cap still scores, a new tile above cap (a 4 with cap 1)
+# ends play without scoring.
+#
+# A slide keeps the sum of tiles and a new tile adds 2 or 4, so positions
+# are solved in layers of decreasing tile sum, each layer only needs values
+# of the layers above it (retrograde analysis).  Positions are addressed by
+# their base cap+1 index, sum(cell value * (cap+1)**i).
+#
+# File format (little-endian):
+#     8 byte magic, uint32 version, uint32 cap, int32 next layer to solve
+#     (-1 when complete), (cap+1)**16 float32 values
+
+MAGIC = b'2048TBSE'
+VERSION = 1
+HEADER = struct.Struct('<8sIIi')
+# probability of a new tile being a 2 (value 1) and a 4 (value 2)
+SPAWNS = ((1, 0.9), (2, 0.1))
+
+
+def num_states(cap: int) -> int:
+    return (cap + 1) ** 16
+
+
+def _weights(cap: int) -> np.ndarray:
+    return (cap + 1) ** np.arange(16, dtype=np.int64)
+
+
+def index_digits(idxs: np.ndarray, cap: int) -> np.ndarray:
+    """(N,16) grids of tablebase indexes"""
+    digits = np.empty((len(idxs), 16), dtype=np.uint8)
+    rem = np.asarray(idxs, dtype=np.int64).copy()
+    for i in range(16):
+        digits[:, i] = rem % (cap + 1)
+        rem //= cap + 1
+    return digits
+
+
+def grid_layers(grids: np.ndarray) -> np.ndarray:
+    """layer (tile sum / 2) of each (N,16) grid"""
+    tiles = np.where(grids > 0, np.left_shift(1, grids.astype(np.int64)), 0)
+    return tiles.sum(axis=1) // 2
+
+
+def solve_positions(idxs: np.ndarray, values: np.ndarray,
+                    cap: int) -> np.ndarray:
+    """
+    Expected score of positions idxs with best play, given values of every
+    position with a larger tile sum
+    """
+    weights = _weights(cap)
+    grids = index_digits(idxs, cap)
+    best = np.zeros(len(idxs))
+    for action in range(4):
+        slid, score = slide_grids(grids, np.full(len(idxs), action))
+        # a slide that changes nothing is not a legal move
+        legal = (slid != grids).any(axis=1)
+        # a merge made a tile above cap, play stops after this slide
+        over = slid.max(axis=1) > cap
+        empty = (slid == 0) & ~over[:, None]
+        count = empty.sum(axis=1)
+        base = np.where(over, 0, slid.astype(np.int64) @ weights)
+        expected = np.zeros(len(idxs))
+        for cell in range(16):
+            rows = np.flatnonzero(empty[:, cell])
+            if len(rows) == 0:
+                continue
+            for value, prob in SPAWNS:
+                # a new tile above cap stops play, scoring nothing more
+                if value <= cap:
+                    expected[rows] += prob * values[
+                        base[rows] + value * weights[cell]]
+        # no open cell for a new tile after the slide, game over
+        value = score + expected / np.maximum(count, 1)
+        value[~legal] = 0.0
+        np.maximum(best, value, out=best)
+    return best
+
+
+# state of each build worker, set by _init_worker()
+_build_cap = None
+_build_layers = None
+_build_values = None
+
+
+def _init_worker(path, layers_path, cap):
+    global _build_cap, _build_layers, _build_values
+    _build_cap = cap
+    _build_layers = np.memmap(layers_path, dtype=np.uint8, mode='r')
+    _build_values = np.memmap(path, dtype='<f4', mode='r+',
+                              offset=HEADER.size)
+
+
+def _solve_chunk(task):
+    layer, start, stop = task
+    idxs = start + np.flatnonzero(_build_layers[start:stop] == layer)
+    if len(idxs) > 0:
+        _build_values[idxs] = solve_positions(idxs, _build_values,
+                                              _build_cap)
+        _build_values.flush()
+    return len(idxs)
+
+
+def _read_header(path: str):
+    with open(path, 'rb') as f:
+        magic, version, cap, next_layer = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a tablebase file")
+    return cap, next_layer
+
+
+def _write_next_layer(path: str, cap: int, next_layer: int):
+    with open(path, 'r+b') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, cap, next_layer))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def build_tablebase(path: str, cap: int = 2, processes: int = None,
+                    chunk: int = 1 << 18, max_layers: int = None,
+                    verbose: bool = True) -> bool:
+    """
+    Solve tablebase for tiles up to cap into path, layers are split into
+    chunks solved by a process pool.  The header records the next layer to
+    solve, so a stopped build resumes from the last finished layer.
+    Stops after max_layers layers, returns True when the build is complete.
+    """
+    if not 1 <= cap <= 3:
+        # cap 3 is already 4**16 positions (17 GB)
+        raise ValueError("cap must be between 1 and 3")
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    n = num_states(cap)
+    top_layer = 16 * (1 << cap) // 2
+    if os.path.exists(path):
+        file_cap, next_layer = _read_header(path)
+        if file_cap != cap:
+            raise ValueError(f"{path} has cap {file_cap}, not {cap}")
+    else:
+        next_layer = top_layer
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, cap, next_layer))
+            f.truncate(HEADER.size + 4 * n)
+    if next_layer < 0:
+        return True
+
+    # layer of every position, shared with workers through a file so the
+    # pool works with any start method
+    layers_path = path + '.layers'
+    layers = np.memmap(layers_path, dtype=np.uint8, mode='w+', shape=(n,))
+    for start in range(0, n, chunk):
+        idxs = np.arange(start, min(start + chunk, n))
+        layers[start:start + len(idxs)] = grid_layers(index_digits(idxs, cap))
+    layers.flush()
+    del layers
+    tasks = [(start, min(start + chunk, n)) for start in range(0, n, chunk)]
+    layers_done = 0
+    try:
+        with multiprocessing.Pool(processes, initializer=_init_worker,
+                                  initargs=(path, layers_path, cap)) as pool:
+            for layer in range(next_layer, -1, -1):
+                start_time = time.monotonic()
+                count = sum(pool.imap_unordered(
+                    _solve_chunk, [(layer, a, b) for a, b in tasks]))
+                _write_next_layer(path, cap, layer - 1)
+                if verbose:
+                    print(f"layer {layer} : {count} positions in "
+                          f"{time.monotonic() - start_time:.1f} sec")
+                layers_done += 1
+                if max_layers is not None and layers_done >= max_layers:
+                    return layer == 0
+    finally:
+        os.remove(layers_path)
+    return True
+
+
+class Tablebase:
+    """
+    Read-only memory-mapped tablebase written by build_tablebase().
+    lookup() is a single array read and needs no numpy.  On big-endian
+    hosts the values are byte swapped into memory instead of mapped.
+    """
+
+    def __init__(self, path: str):
+        self.cap, next_layer = _read_header(path)
+        if next_layer >= 0:
+            raise ValueError(f"{path} is incomplete, build again to resume")
+        self.weights = [(self.cap + 1) ** i for i in range(16)]
+        self._mmap = None
+        if sys.byteorder == 'little':
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+            self._values = memoryview(self._mmap)[HEADER.size:].cast('f')
+        else:
+            # file is little-endian float32
+            self._values = array('f')
+            with open(path, 'rb') as f:
+                f.seek(HEADER.size)
+                self._values.frombytes(f.read())
+            self._values.byteswap()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def close(self):
+        if self._mmap is not None:
+            self._values.release()
+            self._mmap.close()
+
+    def lookup(self, grid: Grid4x4) -> float:
+        """
+        expected score from grid (before the next slide) with best play,
+        0.0 once a tile is above cap
+        """
+        cells = grid._grid
+        if max(cells) > self.cap:
+            return 0.0
+        return self._values[sum(v * w for v, w in zip(cells, self.weights))]
+
+
+class PlayerTablebase(PlayerExpectimax):
+    """
+    Expectimax that scores moves by their merge score plus the value of the
+    positions after them, and reads tablebase values at its leaves instead
+    of the PlayerCorner heuristic.  Leaf values are exact, so depth 1 is
+    already best play for the tablebase score.
+    """
+
+    def __init__(self, game, tablebase: Tablebase, depth=1):
+        super().__init__(game, depth)
+        self.tablebase = tablebase
+
+    def move_value(self, direction, depth):
+        checkpoint = self.game.save()
+        score = self.game.slide(direction)
+        if self.game.grid._grid == checkpoint['grid']:
+            value = None
+        elif self.game.max_value() > self.tablebase.cap:
+            value = score
+        else:
+            value = score + self.chance_value(depth)
+        self.game.restore(checkpoint)
+        return value
+
+    def best_value(self, depth):
+        if depth > 0:
+            return super().best_value(depth)
+        self.nodes += 1
+        return self.tablebase.lookup(self.game.grid)
+
+
+def play_within_cap(player, cap: int, games: int, max_iterations=1200):
+    """
+    (mean score, seconds per move) of player, playing each game until it is
+    over or has a tile above cap
+    """
+    total = 0
+    moves = 0
+    seconds = 0.0
+    for _ in range(games):
+        game = player.game
+        game.reset()
+        for _ in range(max_iterations):
+            if game.max_value() > cap:
+                break
+            start = time.perf_counter()
+            direction = player.choose_direction()
+            seconds += time.perf_counter() - start
+            moves += 1
+            total += game.slide(direction)
+            if game.max_value() > cap or not game.add_tile():
+                break
+    return total / games, seconds / max(moves, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build an endgame tablebase and compare it with search")
+    parser.add_argument('path', help="tablebase file, resumed if it exists")
+    parser.add_argument('--cap', type=int, default=2,
+                        help="largest tile value (log2) in tablebase "
+                        "positions")
+    parser.add_argument('--processes', type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument('--games', type=int, default=200,
+                        help="benchmark games")
+    parser.add_argument('--depth', type=int, default=2,
+                        help="expectimax depth to compare with")
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    build_tablebase(args.path, args.cap, args.processes)
+    print(f"tablebase ready in {time.monotonic() - start:.1f} sec")
+    tablebase = Tablebase(args.path)
+
+    game = Game2048()
+    grids = []
+    for _ in range(1000):
+        game.reset()
+        grids.append(Grid4x4(game.grid))
+    start = time.perf_counter()
+    exact = sum(tablebase.lookup(grid) for grid in grids) / len(grids)
+    lookup_sec = (time.perf_counter() - start) / len(grids)
+
+    print("-"*80)
+    print(f"score until a tile above {1 << args.cap}, exact expected from "
+          f"start {exact:.2f}, lookup {lookup_sec*1e6:.2f} us")
+    print(f"{'player':<24s} {'mean score':<12} {'ms/move':<10}")
+    print("-"*80)
+    players = {
+        'tablebase': PlayerTablebase(Game2048(), tablebase),
+        f'expectimax depth {args.depth}': PlayerExpectimax(Game2048(),
+                                                           args.depth),
+    }
+    for name, player in players.items():
+        score, sec = play_within_cap(player, args.cap, args.games)
+        print(f"{name:<24s} {score:<12.2f} {sec*1000:<10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from batch2048 import BatchGame2048, slide_grids
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from grid_batch import (FLIPS, UNFLIP_ACTIONS, flip_actions,
+                        heavy_side_flips)
+import numpy as np
+
+
+def random_grids(n, seed=0):
+    rng = np.random.default_rng(seed)
+    grids = rng.integers(0, 12, size=(n, 16), dtype=np.uint8)
+    # plenty of empty cells and equal neighbours
+    grids[rng.random((n, 16)) < 0.4] = 0
+    return grids
+
+
+def test_slide_grids():
+    grids = random_grids(200)
+    for a, direction in enumerate("LDUR"):
+        slid, scores = slide_grids(grids, np.full(len(grids), a))
+        for i in range(len(grids)):
+            game = Game2048(Grid4x4())
+            game.grid._grid = grids[i].tolist()
+            score = game.slide(direction)
+            assert slid[i].tolist() == game.grid._grid
+            assert scores[i] == score
+
+
+def test_batch_game():
+    n = 100
+    batch = BatchGame2048(n, np.random.default_rng(1))
+    assert ((batch.grids > 0).sum(axis=1) == 2).all()
+    active = np.ones(n, dtype=bool)
+    for _ in range(50):
+        before = batch.grids.copy()
+        actions = np.random.default_rng(2).integers(0, 4, n)
+        batch.slide(actions, active)
+        slid, _ = slide_grids(before, actions)
+        assert np.array_equal(batch.grids[active], slid[active])
+        added = batch.add_tile(active)
+        # a successful add puts a single 2 or 4 in an empty cell
+        diff = batch.grids != slid
+        assert (diff[added].sum(axis=1) == 1).all()
+        assert np.isin(batch.grids[diff], (1, 2)).all()
+        active &= added
+    assert np.array_equal(batch.max_value(), batch.grids.max(axis=1))
+
+
+def test_heavy_side_flips():
+    grids = random_grids(200, seed=3)
+    flips = heavy_side_flips(grids)
+    for i in range(len(grids)):
+        grid = Grid4x4()
+        grid._grid = grids[i].tolist()
+        assert FLIPS[flips[i]] == grid.heavy_side_flip_args()
+    actions = np.arange(len(grids)) % 4
+    assert np.array_equal(
+        UNFLIP_ACTIONS[flips, flip_actions(actions, flips)], actions)
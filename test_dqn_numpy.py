@@ -0,0 +1,70 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from dqn_numpy import NumpyDQN, export_dqn
+from players import PlayerDQN
+from game2048 import Game2048
+import numpy as np
+import pytest
+
+
+def make_state_dict(rng, sizes=(192, 32, 32, 4)):
+    state = {}
+    for n, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:]), start=1):
+        state[f'layer{n}.weight'] = rng.normal(size=(n_out, n_in))
+        state[f'layer{n}.bias'] = rng.normal(size=n_out)
+    return state
+
+
+def reference_forward(state, obs):
+    x = obs
+    for n in (1, 2, 3):
+        x = x @ state[f'layer{n}.weight'].T + state[f'layer{n}.bias']
+        if n < 3:
+            x = np.maximum(x, 0)
+    return x
+
+
+@pytest.mark.parametrize("quantize,tol", [
+    (None, 1e-4), ('float16', 0.05), ('int8', 0.2)])
+def test_export_load(tmp_path, quantize, tol):
+    rng = np.random.default_rng(0)
+    state = make_state_dict(rng)
+    path = str(tmp_path / "dqn.npz")
+    export_dqn(state, path, quantize=quantize)
+    model = NumpyDQN.load(path)
+    obs = rng.integers(0, 2, size=(10, 192)).astype(np.float32)
+    expect = reference_forward(state, obs)
+    q = model(obs)
+    assert q.shape == (10, 4)
+    assert np.abs(q - expect).max() < tol * np.abs(expect).max()
+    assert np.allclose(model(obs[0]), q[0])
+
+
+def test_player_dqn(tmp_path):
+    path = str(tmp_path / "dqn.npz")
+    export_dqn(make_state_dict(np.random.default_rng(1), (64, 8, 8, 4)),
+               path, observation='bit_vec')
+    player = PlayerDQN(Game2048(), path)
+    iteration, max_value = player.run(100)
+    assert iteration > 0
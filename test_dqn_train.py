@@ -0,0 +1,53 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from dqn_train import Checkpointer, Trainer, load_checkpoint  # noqa: E402
+
+
+CONFIG = {'env': 'Environment4', 'batch_size': 8, 'memory': 500,
+          'hidden': 16, 'seed': 3}
+
+
+def test_resume_exact(tmp_path):
+    trainer = Trainer(CONFIG)
+    trainer.train(6)
+
+    path = str(tmp_path / "checkpoint.pt")
+    first = Trainer(CONFIG)
+    with Checkpointer(path, verbose=False) as checkpointer:
+        first.train(3, checkpointer=checkpointer, checkpoint_every=2)
+    assert len(checkpointer.writes) == 2
+    state = load_checkpoint(path)
+    assert len(state['episode_durations']) == 3
+
+    resumed = Trainer(state['config'])
+    resumed.load_state_dict(state)
+    resumed.train(6)
+    assert resumed.episode_durations == trainer.episode_durations
+    assert resumed.steps_done == trainer.steps_done
+    for key, value in trainer.policy_net.state_dict().items():
+        assert torch.equal(resumed.policy_net.state_dict()[key], value)
@@ -0,0 +1,50 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from expert_data import ShardDataset, ShardWriter, play_games
+from grid4x4 import Grid4x4
+import numpy as np
+
+
+def test_shards(tmp_path):
+    transitions = play_games('max_score', 3, seed=1, max_iterations=1000)
+    assert transitions['done'].sum() == 3
+    first = transitions[0]
+    grid = Grid4x4.unpack(int(first['next_grid']))
+    assert len([v for v in grid._grid if v > 0]) >= 2
+
+    writer = ShardWriter(str(tmp_path), shard_size=100)
+    writer.write(transitions[:150])
+    writer.write(transitions[150:])
+    writer.close()
+    dataset = ShardDataset(str(tmp_path))
+    assert len(dataset) == len(transitions)
+    assert len(dataset.index['shards']) == (len(transitions) + 99) // 100
+
+    rng = np.random.default_rng(0)
+    batches = list(dataset.batches(16, rng, shards_in_memory=2))
+    assert len(batches) == len(transitions) // 16
+    actions = np.concatenate([b['action'] for b in batches])
+    assert actions.shape == (len(batches) * 16,)
+    assert batches[0]['grid'].shape == (16, 16)
+    assert batches[0]['grid'].dtype == np.uint8
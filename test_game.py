@@ -22,6 +22,7 @@
 
 from game2048 import Game2048
 from grid4x4 import Grid4x4
+from itertools import product
 
 
 def test_slide_left():
@@ -32,7 +33,7 @@ def test_slide_left():
                    5665
                    """)
     game = Game2048(grid)
-    game.slide("L")
+    score = game.slide("L")
 
     expect = Grid4x4("""
                      23..
@@ -42,3 +43,20 @@ def test_slide_left():
                      """)
 
     assert game.grid == expect, f"\n{game.grid}"
+    assert score == 4 + 8 + 16 + 128
+
+
+def test_flip_direction():
+    grid = Grid4x4("""
+                   1122
+                   .3.3
+                   .41.
+                   5.6.
+                   """)
+    for flip in product((False, True), repeat=3):
+        for direction in "LDUR":
+            game = Game2048(grid)
+            game.slide(direction)
+            flipped = Game2048(grid.flip(*flip))
+            flipped.slide(Grid4x4.flip_direction(direction, *flip))
+            assert flipped.grid == game.grid.flip(*flip), f"{flip} {direction}"
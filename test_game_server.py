@@ -0,0 +1,83 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+from game2048 import Game2048
+from game_server import (ERROR, GAME_OVER, OK, RESPONSE, GameClient,
+                         GameServer)
+from grid4x4 import Grid4x4
+from load_generator import latency_percentiles, print_summary, run_load
+
+
+def test_server_session():
+    async def session():
+        server = GameServer(seed=1)
+        await server.start('127.0.0.1', 0)
+        port = server.server.sockets[0].getsockname()[1]
+        client = await GameClient.connect('127.0.0.1', port)
+        assert (await client.move('L'))[0] == ERROR
+        status, packed, score = await client.new_game()
+        assert status == OK and score == 0
+        assert sum(v > 0 for v in Grid4x4.unpack(packed)._grid) == 2
+        total = 0
+        for _ in range(1000):
+            game = Game2048(Grid4x4.unpack(packed))
+            merged = game.slide('L')
+            status, packed, score = await client.move('L')
+            total += merged
+            assert score == total
+            if status == GAME_OVER:
+                break
+            # server added a single tile to the slid grid
+            grid = Grid4x4.unpack(packed)
+            assert sum(a != b for a, b in
+                       zip(grid._grid, game.grid._grid)) == 1
+        assert status == GAME_OVER
+        assert (await client.move('L'))[0] == ERROR
+
+        # pipelined requests get one response each, in order
+        client.writer.write(b'NLRx')
+        data = await client.reader.readexactly(4 * RESPONSE.size)
+        statuses = [RESPONSE.unpack_from(data, i * RESPONSE.size)[0]
+                    for i in range(4)]
+        assert statuses[0] == OK and statuses[3] == ERROR
+        await client.close()
+        server.close()
+        assert server.moves > 0
+
+    asyncio.run(session())
+
+
+def test_run_load():
+    latencies, results, elapsed = asyncio.run(
+        run_load(20, 2, 'random', local=True))
+    assert len(results) == 40
+    assert len(latencies) == sum(iteration + 1 for iteration, _, _ in results)
+
+
+def test_empty_summary(capsys):
+    # every session failed, nothing was played
+    print_summary(4, [], [], 0.0)
+    assert "mean score     0.0" in capsys.readouterr().out
+    assert latency_percentiles([0.5]) == {50: 0.5, 90: 0.5, 99: 0.5,
+                                          100: 0.5}
+    assert latency_percentiles([i / 100 for i in range(101)])[90] == 0.9
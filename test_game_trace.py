@@ -0,0 +1,82 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from game2048 import Game2048
+from game_trace import TraceWriter, TracingGame, read_traces
+from grid4x4 import Grid4x4
+from players import PlayerCorner, PlayerRandom
+from tile_random import TileRandom
+import random
+
+
+def test_record_players(tmp_path):
+    random.seed(5)
+    finals = []
+    with TraceWriter(str(tmp_path), games_per_chunk=2) as writer:
+        game = TracingGame(writer)
+        for player in (PlayerRandom(game), PlayerCorner(game)):
+            for _ in range(3):
+                iteration, _ = player.run(1200)
+                finals.append((iteration + 1, Grid4x4(game.grid)))
+    assert len(list(tmp_path.iterdir())) == 3
+    traces = list(read_traces(str(tmp_path)))
+    assert len(traces) == len(finals)
+    for trace, (moves, final) in zip(traces, finals):
+        assert len(trace.moves()) == moves
+        # one byte per move, last move has no new tile
+        assert len(trace.events) == moves
+        assert trace.state_at(moves) == final
+
+
+def test_record_flips(tmp_path):
+    states = []
+    with TraceWriter(str(tmp_path)) as writer:
+        game = TracingGame(writer)
+        states.append(Grid4x4(game.grid))
+        for direction in "LURD":
+            # gym environments flip grid between moves
+            game.grid = game.grid.flip(True, False, True)
+            game.slide(direction)
+            game.add_tile()
+            states.append(Grid4x4(game.grid))
+        game.grid = Grid4x4("1234\n....\n....\n....")
+        game.slide("D")
+        game.add_tile()
+        states.append(Grid4x4(game.grid))
+        seed = game.seed
+        game.finish_game()
+    trace, = read_traces(str(tmp_path))
+    assert trace.seed == seed
+    assert trace.moves() == list("LURDD")
+    assert [Grid4x4(g.grid) for g in trace.replay()] == states
+
+
+def test_rng(tmp_path):
+    rng = TileRandom()
+    with TraceWriter(str(tmp_path)) as writer:
+        game = TracingGame(writer, rng=rng)
+        for _ in range(2):
+            assert game.random is rng
+            # the game seed restarts the rng passed in
+            assert game.grid == Game2048(rng=TileRandom(game.seed)).grid
+            game.reset()
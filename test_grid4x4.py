@@ -290,3 +290,63 @@ def test_heavyside_all():
     """)
     grid1_flipped = grid1.heavy_side_flip()
     assert grid1_flipped == grid2
+
+
+def test_pack_unpack():
+    grid = Grid4x4("""
+    .123
+    4567
+    89AB
+    CDEF
+    """)
+    packed = grid.pack()
+    assert packed == 0xFEDCBA9876543210
+    assert Grid4x4.unpack(packed) == grid
+    assert Grid4x4().pack() == 0
+
+
+def test_canonical():
+    grid_orig = Grid4x4("""
+    .1..
+    ..2.
+    ...3
+    4...
+    """)
+    packed, flip = grid_orig.canonical()
+    assert grid_orig.flip(*flip).pack() == packed
+    for args in product((False, True), repeat=3):
+        grid = grid_orig.flip(*args)
+        assert grid.canonical()[0] == packed
+        assert grid.pack() >= packed
+
+
+def test_construct_flat_and_bytes():
+    grid = Grid4x4("""
+                   1.3.
+                   .4..
+                   ..AF
+                   2...
+                   """)
+    assert Grid4x4(grid._grid) == grid
+    assert Grid4x4(bytes(grid)) == grid
+    assert Grid4x4.from_buffer(bytearray(bytes(grid))) == grid
+    assert Grid4x4([grid._grid[y*4:y*4+4] for y in range(4)]) == grid
+    assert bytes(grid)[10:12] == bytes([10, 15])
+
+
+def test_flip_tables():
+    from grid4x4 import _make_symmetries
+    grid = Grid4x4()
+    grid._grid = list(range(16))
+    for flip, perm in _make_symmetries():
+        # table lookup matches the cell by cell flip
+        slow_perm = [0] * 16
+        xo, xi = (3, -1) if flip[0] else (0, 1)
+        yo, yi = (3, -1) if flip[1] else (0, 1)
+        for y in range(4):
+            for x in range(4):
+                xn, yn = (x*xi + xo, y*yi + yo)
+                if flip[2]:
+                    xn, yn = (yn, xn)
+                slow_perm[yn*4 + xn] = y*4 + x
+        assert grid.flip(*flip)._grid == slow_perm
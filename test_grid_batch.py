@@ -0,0 +1,125 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from grid_batch import (FLIPS, array_to_grids, flip_actions, flip_grids,
+                        format_boards, grids_from_buffer, grids_to_array,
+                        one_hot, pack_grids, parse_boards, read_boards,
+                        read_packed, unpack_grids, write_boards)
+import numpy as np
+import pytest
+
+
+def test_pack_unpack():
+    games = [Game2048() for _ in range(10)]
+    grids = np.array([game.grid._grid for game in games], dtype=np.uint8)
+    grids[0, :] = 15
+    games[0].grid._grid = [15] * 16
+    packed = pack_grids(grids)
+    assert packed.dtype == np.uint64
+    assert packed.tolist() == [game.grid.pack() for game in games]
+    assert np.array_equal(unpack_grids(packed), grids)
+
+
+def test_flip_tables():
+    game = Game2048(Grid4x4("""
+                            1122
+                            .3.3
+                            .41.
+                            5.6.
+                            """))
+    grids = np.array([game.grid._grid] * 8, dtype=np.uint8)
+    flips = np.arange(8)
+    flipped = flip_grids(grids, flips)
+    for f, flip in enumerate(FLIPS):
+        assert flipped[f].tolist() == game.grid.flip(*flip)._grid
+        for a, direction in enumerate("LDUR"):
+            slid = Game2048(game.grid)
+            slid.slide(direction)
+            flipped_slid = Game2048(game.grid.flip(*flip))
+            flipped_slid.slide("LDUR"[flip_actions(np.array([a]), f)[0]])
+            assert flipped_slid.grid == slid.grid.flip(*flip)
+
+
+def test_one_hot():
+    grids = np.array([[0] * 15 + [11], list(range(16))], dtype=np.uint8)
+    obs = one_hot(grids, levels=16)
+    assert obs.shape == (2, 256)
+    assert obs[0, 15*16 + 11] == 1.0
+    assert obs[0].sum() == 16
+    for i in range(16):
+        assert obs[1, i*16 + i] == 1.0
+
+
+def test_grid_arrays():
+    grids = np.random.default_rng(0).integers(0, 16, (50, 16),
+                                              dtype=np.uint8)
+    objs = array_to_grids(grids)
+    assert [g._grid for g in objs] == grids.tolist()
+    assert np.array_equal(grids_to_array(objs), grids)
+    assert np.array_equal(np.asarray(objs[3]), grids[3])
+    assert np.array_equal(np.asarray(Game2048(objs[3])), grids[3])
+    assert Grid4x4(grids[3]) == objs[3]
+    assert Grid4x4(grids[3].reshape(4, 4)) == objs[3]
+    assert Grid4x4.from_buffer(grids[3]) == objs[3]
+
+    buffer = bytearray(grids.tobytes())
+    view = grids_from_buffer(buffer)
+    assert np.array_equal(view, grids)
+    buffer[16] = 15
+    assert view[1, 0] == 15
+
+
+def test_board_text():
+    grids = np.random.default_rng(1).integers(0, 16, (20, 16),
+                                              dtype=np.uint8)
+    text = format_boards(grids)
+    assert text.splitlines()[0] == str(Grid4x4(grids[0])).replace("\n", "")
+    assert np.array_equal(parse_boards(text), grids)
+    assert np.array_equal(
+        parse_boards("".join(str(g) for g in array_to_grids(grids))), grids)
+    with pytest.raises(ValueError):
+        parse_boards("123")
+    with pytest.raises(ValueError):
+        parse_boards("123456789ABCDEFx")
+
+
+def test_board_files(tmp_path):
+    grids = np.random.default_rng(2).integers(0, 16, (20, 16),
+                                              dtype=np.uint8)
+    for name in ('boards.txt', 'boards.bin'):
+        path = str(tmp_path / name)
+        write_boards(path, grids)
+        assert np.array_equal(read_boards(path), grids)
+    assert read_packed(path).tolist() == pack_grids(grids).tolist()
+
+
+def test_empty_board_files(tmp_path):
+    empty = np.zeros((0, 16), dtype=np.uint8)
+    for name in ('boards.txt', 'boards.bin'):
+        path = str(tmp_path / name)
+        write_boards(path, empty)
+        assert read_boards(path).shape == (0, 16)
+    packed = read_packed(path)
+    assert len(packed) == 0 and packed.dtype == np.uint64
@@ -0,0 +1,75 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from inference_server import InferenceServer, play_client_games
+from players import PlayerPolicy
+import numpy as np
+import threading
+
+
+def prefer_left(obs):
+    q = np.zeros((len(obs), 4), dtype=np.float32)
+    q[:, 0] = 1.0
+    return q
+
+
+def test_policy_player_unflips():
+    # heavy side is right, policy sees it flipped to left
+    game = Game2048(Grid4x4("""
+                            ..12
+                            ..34
+                            ..56
+                            ..12
+                            """))
+    player = PlayerPolicy(game, lambda obs: 0)
+    assert player.choose_direction() == "R"
+    player = PlayerPolicy(game, lambda obs: 0, canonicalize=False)
+    assert player.choose_direction() == "L"
+
+
+def test_stats_before_requests():
+    server = InferenceServer(prefer_left, num_clients=1, multiprocess=False)
+    stats = server.stats()
+    assert stats['requests'] == 0
+    assert stats['latency_p99'] == 0.0
+    server.print_stats()
+
+
+def test_batched_threads():
+    server = InferenceServer(prefer_left, num_clients=8, max_wait=0.01,
+                             multiprocess=False)
+    moves = []
+    with server:
+        threads = [threading.Thread(
+            target=lambda c=c, i=i: moves.append(play_client_games(c, 1, i)))
+            for i, c in enumerate(server.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    stats = server.stats()
+    assert stats['requests'] == sum(moves)
+    assert stats['mean_batch'] > 1.0
+    assert max(stats['batch_sizes']) <= 8
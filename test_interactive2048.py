@@ -0,0 +1,98 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+from game2048 import Game2048
+from game_trace import TraceWriter, TracingGame
+from interactive2048 import (Renderer, Spectator, player_frames,
+                             trace_frames)
+from players import PlayerCorner, PlayerRandom
+
+
+class FakeScreen:
+    def __init__(self):
+        self.writes = []
+
+    def addstr(self, *args):
+        self.writes.append(args)
+
+    def move(self, y, x):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def test_renderer_draws_changes():
+    screen = FakeScreen()
+    renderer = Renderer(screen)
+    grid = [0] * 16
+    renderer.draw(grid, ["a", "b"])
+    assert len(screen.writes) == 18
+    screen.writes.clear()
+    grid[5] = 11
+    renderer.draw(grid, ["a", "c"])
+    assert screen.writes == [(1, 6, " 2048 "), ("c",)]
+    screen.writes.clear()
+    renderer.draw(grid, ["a"])
+    assert screen.writes == [("",)]
+
+
+def test_trace_frames(tmp_path):
+    with TraceWriter(str(tmp_path)) as writer:
+        game = TracingGame(writer)
+        player = PlayerCorner(game)
+        results = [player.run(1200) for _ in range(2)]
+        game.finish_game()
+    frames = list(trace_frames(str(tmp_path)))
+    for trial, (iteration, max_value) in enumerate(results):
+        game_frames = [f for f in frames if f.game == trial]
+        assert len(game_frames) == iteration + 2
+        assert game_frames[-1].game_over
+        assert max(game_frames[-1].grid) == max_value
+    assert [f.game for f in trace_frames(str(tmp_path), 1)][0] == 1
+
+
+def test_spectator_controls():
+    player = PlayerRandom(Game2048())
+    spectator = Spectator(player_frames(player, 1000), speed=1000)
+    spectator.toggle_pause()
+    spectator.start()
+    time.sleep(0.05)
+    assert spectator.moves == 0
+    spectator.step()
+    spectator.step()
+    deadline = time.monotonic() + 5
+    while spectator.moves < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert spectator.moves == 2
+    assert spectator.frame.iteration == 1
+    spectator.toggle_fast()
+    spectator.toggle_pause()
+    while spectator.moves < 1000 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    spectator.stop()
+    assert spectator.moves >= 1000
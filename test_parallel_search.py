@@ -0,0 +1,57 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from game2048 import Game2048
+from parallel_search import PlayerRootParallel, percentile
+import random
+
+
+def play_moves(player, moves):
+    game = player.game
+    game.reset()
+    stats = []
+    for _ in range(moves):
+        direction = player.choose_direction()
+        stats.append(player.last_stats)
+        game.slide(direction)
+        if not game.add_tile():
+            game.reset()
+    return stats
+
+
+def test_budget():
+    random.seed(3)
+    budget = 0.1
+    with PlayerRootParallel(Game2048(), budget=budget, max_depth=8,
+                            processes=2) as player:
+        stats = play_moves(player, 60)
+    assert percentile([s['elapsed'] for s in stats], 99) < budget
+
+
+def test_fewer_processes_than_moves():
+    # moves queued behind the first get their own time slice instead of
+    # starting after the deadline
+    random.seed(4)
+    with PlayerRootParallel(Game2048(), budget=0.1, max_depth=3,
+                            processes=1) as player:
+        stats = play_moves(player, 30)
+    assert min(s['depth'] for s in stats) >= 1
@@ -0,0 +1,104 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from itertools import product
+from opening_book import OpeningBook, reset_positions
+from players import PlayerExpectimax, PlayerMaxScore
+
+
+def test_restore_checkpoint_twice():
+    game = Game2048(Grid4x4("""
+                            1122
+                            ....
+                            ....
+                            ....
+                            """))
+    checkpoint = game.save()
+    game.slide("L")
+    game.restore(checkpoint)
+    game.slide("R")
+    game.restore(checkpoint)
+    assert game.grid == Grid4x4("1122\n....\n....\n....")
+
+
+def test_max_score_merges():
+    game = Game2048(Grid4x4("""
+                            1...
+                            ....
+                            ....
+                            1...
+                            """))
+    player = PlayerMaxScore(game)
+    assert player.choose_direction() in "UD"
+
+
+def test_expectimax_skips_unchanged_slide():
+    game = Game2048(Grid4x4("""
+                            1...
+                            2...
+                            ....
+                            ....
+                            """))
+    player = PlayerExpectimax(game, depth=1)
+    assert player.move_value("L", 1) is None
+    assert player.move_value("U", 1) is None
+    assert player.move_value("R", 1) is not None
+    assert player.choose_direction() in "RD"
+    assert player.nodes > 0
+
+
+def test_opening_book(tmp_path):
+    grid = Grid4x4("""
+                   1...
+                   ....
+                   ....
+                   ..2.
+                   """)
+    packed, flip = grid.canonical()
+    canonical_direction = Grid4x4.flip_direction("R", *flip)
+    book = OpeningBook({packed: canonical_direction}, depth=3)
+    path = str(tmp_path / "book.bin")
+    book.save(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    # keys are little-endian on any host
+    start = OpeningBook.HEADER.size
+    assert data[start:start + 8] == packed.to_bytes(8, 'little')
+    book = OpeningBook.load(path)
+    assert len(book) == 1
+    assert book.depth == 3
+    player = PlayerExpectimax(Game2048(grid), book=book)
+    assert player.choose_direction() == "R"
+    for flip in product((False, True), repeat=3):
+        expect = Grid4x4.flip_direction("R", *flip)
+        assert book.lookup(grid.flip(*flip)) == expect
+    assert book.lookup(Grid4x4("1...\n....\n....\n.2..")) is None
+
+
+def test_reset_positions():
+    positions = reset_positions()
+    for _ in range(20):
+        game = Game2048()
+        assert game.grid.canonical()[0] in positions
@@ -0,0 +1,103 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from players import PlayerExpectimax
+from position_cache import PositionCache
+
+
+def test_depth(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with PositionCache(path) as cache:
+        cache.put(0xF000000000000001, 1.5, 2)
+        assert cache.get(0xF000000000000001, 2) == 1.5
+        assert cache.get(0xF000000000000001, 3) is None
+        # shallower value does not replace deeper one
+        cache.put(0xF000000000000001, 9.0, 1)
+        cache.flush()
+        cache.put(0xF000000000000001, 2.5, 1)
+    with PositionCache(path) as cache:
+        assert len(cache) == 1
+        assert cache.get(0xF000000000000001, 1) == 1.5
+
+
+def test_evict(tmp_path):
+    with PositionCache(str(tmp_path / "cache.sqlite"),
+                       max_entries=2) as cache:
+        cache.put(1, 1.0, 3)
+        cache.put(2, 2.0, 1)
+        cache.put(3, 3.0, 2)
+        assert len(cache) == 2
+        assert cache.get(2, 1) is None
+        assert cache.get(1, 3) == 1.0
+
+
+def test_count(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with PositionCache(path, max_entries=3, flush_every=2) as cache:
+        for depth in (1, 2, 1):
+            # updates of stored positions are not new rows
+            cache.put(1, 1.0, depth)
+            cache.put(2, 2.0, depth)
+        assert len(cache) == 2
+        cache.put(3, 3.0, 1)
+        cache.put(4, 4.0, 3)
+        assert len(cache) == 3
+        assert cache.get(3, 1) is None
+    with PositionCache(path) as cache:
+        assert len(cache) == 3
+        assert cache.get(2, 2) == 2.0
+
+
+def test_shared_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    caches = [PositionCache(path, max_entries=10, flush_every=5)
+              for _ in range(4)]
+    for i, cache in enumerate(caches):
+        for key in range(10):
+            cache.put(i * 10 + key, 1.0, 1)
+    for cache in caches:
+        cache.close()
+    with PositionCache(path) as cache:
+        assert len(cache) == 10
+
+
+def test_player_cache(tmp_path):
+    grid = Grid4x4("""
+                   12..
+                   1...
+                   ....
+                   ....
+                   """)
+    with PositionCache(str(tmp_path / "cache.sqlite")) as cache:
+        player = PlayerExpectimax(Game2048(grid), depth=2, cache=cache)
+        direction = player.choose_direction()
+        nodes = player.nodes
+        player.nodes = 0
+        # flipped grid hits the same cache entries
+        player.game.grid = grid.flip(True, False, False)
+        player.choose_direction()
+        assert player.nodes < nodes
+        assert cache.hits > 0
+    assert direction in "LDUR"
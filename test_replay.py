@@ -0,0 +1,85 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from grid_batch import FLIPS, pack_grids
+from replay import ReplayBuffer
+import numpy as np
+
+
+def test_push_sample():
+    memory = ReplayBuffer(4, np.random.default_rng(0))
+    grid = Grid4x4("1...\n....\n....\n....")
+    next_grid = Grid4x4("1...\n....\n....\n...1")
+    for _ in range(6):
+        memory.push(grid.pack(), 2, 1.5, next_grid.pack())
+    memory.push(next_grid.pack(), 0, -1.0, None)
+    assert len(memory) == 4
+    assert memory.done.sum() == 1
+
+    batch = memory.sample(64, augment=False)
+    assert batch['grid'].shape == (64, 16)
+    done = batch['done']
+    assert (batch['next_grid'][done] == 0).all()
+    assert (batch['action'][~done] == 2).all()
+    assert (batch['reward'][done] == -1.0).all()
+
+
+def test_augment():
+    memory = ReplayBuffer(16, np.random.default_rng(1))
+    grid = Grid4x4("1...\n....\n....\n....")
+    memory.push(grid.pack(), "LDUR".index("U"), 0.0, grid.pack())
+    batch = memory.sample(200)
+    corners = set(pack_grids(batch['grid']).tolist())
+    assert len(corners) == 4
+    # slide up moves tile towards y=0, grid flip must follow
+    for g, a in zip(batch['grid'], batch['action']):
+        cell = int(np.argmax(g))
+        x, y = cell % 4, cell // 4
+        direction = "LDUR"[a]
+        assert direction in ("U" if y == 0 else "D") + ("L" if x == 0 else "R")
+
+
+def test_augment_flips():
+    memory = ReplayBuffer(16, np.random.default_rng(2))
+    # no symmetry, so each flip gives a different grid
+    grid = Grid4x4("12..\n3...\n....\n...1")
+    game = Game2048(grid)
+    game.slide("U")
+    memory.push(grid.pack(), "LDUR".index("U"), 0.0, game.grid.pack())
+    batch = memory.sample(400)
+    flipped = {g.pack(): flip for flip, g in
+               ((f, grid.flip(*f)) for f in FLIPS)}
+    seen = set()
+    for g, a, n in zip(batch['grid'], batch['action'], batch['next_grid']):
+        flip = flipped[Grid4x4(g.tolist()).pack()]
+        seen.add(flip)
+        direction = "LDUR"[a]
+        assert direction == Grid4x4.flip_direction("U", *flip)
+        assert Grid4x4(n.tolist()) == game.grid.flip(*flip)
+        # the flipped move on the flipped grid gives the flipped result
+        check = Game2048(grid.flip(*flip))
+        check.slide(direction)
+        assert check.grid == game.grid.flip(*flip)
+    assert len(seen) == 8
@@ -0,0 +1,100 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import pytest
+import warnings
+from sweep import (CONFIG_TYPES, main, make_configs, parse_value, rungs,
+                   run_sweep)
+
+
+def test_make_configs():
+    spec = {'base': {'hidden': 16},
+            'grid': {'env': ['Environment4', 'Environment5'],
+                     'augment': [False, True]},
+            'random': {'lr': ['log_uniform', 1e-5, 1e-3],
+                       'eps_decay': ['int_uniform', 100, 1000]},
+            'samples': 3}
+    configs = make_configs(spec, seed=1)
+    assert len(configs) == 12
+    assert all(c['hidden'] == 16 for c in configs)
+    assert all(1e-5 <= c['lr'] <= 1e-3 for c in configs)
+    assert all(isinstance(c['eps_decay'], int) for c in configs)
+    assert len({(c['env'], c['augment']) for c in configs}) == 4
+    assert make_configs(spec, seed=1) == configs
+
+
+def test_parse_and_rungs():
+    assert parse_value('lr', '1e-4') == 1e-4
+    assert parse_value('augment', 'true') is True
+    assert parse_value('env', 'Environment5') == 'Environment5'
+    assert rungs(100, 1000, 3) == [100, 300, 900, 1000]
+    assert rungs(100, 100, 3) == [100]
+
+
+def test_config_types():
+    dqn_train = pytest.importorskip("dqn_train")
+    assert CONFIG_TYPES == {key: type(value) for key, value in
+                            dqn_train.DEFAULT_CONFIG.items()}
+
+
+def test_successive_halving(tmp_path):
+    pytest.importorskip("torch")
+    configs = make_configs({'base': {'env': 'Environment4', 'batch_size': 8,
+                                     'memory': 200, 'hidden': 8},
+                            'grid': {'seed': [1, 2, 3, 4]}})
+    runs = run_sweep(configs, str(tmp_path), min_episodes=2,
+                     max_episodes=4, eta=2, processes=2, window=2,
+                     checkpoint_every=2, verbose=False)
+    finished = [run for run in runs if run['episodes'] == 4]
+    stopped = [run for run in runs if run['stopped']]
+    assert len(finished) == 2 and len(stopped) == 2
+    with open(tmp_path / "sweep.jsonl") as f:
+        first_rung = [json.loads(line) for line in f]
+    scores = {r['run']: r['score'] for r in first_rung if r['rung'] == 0}
+    assert min(scores[r['run']] for r in finished) >= \
+        max(scores[r['run']] for r in stopped)
+    assert (tmp_path / "run_000" / "metrics.jsonl").exists()
+    # a finished sweep resumes from checkpoints without training again
+    again = run_sweep(configs, str(tmp_path), min_episodes=2,
+                      max_episodes=4, eta=2, processes=2, window=2,
+                      checkpoint_every=2, verbose=False)
+    assert again == runs
+
+
+def test_main_int_uniform(tmp_path):
+    pytest.importorskip("torch")
+    out = str(tmp_path / "sweep")
+    with warnings.catch_warnings():
+        # randint with float bounds warns before Python 3.12, then raises
+        warnings.simplefilter("error", DeprecationWarning)
+        main(['--grid', 'env=Environment4', '--grid', 'batch_size=8',
+              '--grid', 'memory=200', '--random', 'hidden=int_uniform:4:8',
+              '--random', 'lr=log_uniform:1e-4:1e-3', '--samples', '2',
+              '--out', out, '--min-episodes', '2', '--max-episodes', '2',
+              '--processes', '1', '--window', '2'])
+    for run in ('run_000', 'run_001'):
+        with open(os.path.join(out, run, 'config.json')) as f:
+            config = json.load(f)
+        assert isinstance(config['hidden'], int)
+        assert 4 <= config['hidden'] <= 8
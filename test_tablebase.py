@@ -0,0 +1,156 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from functools import lru_cache
+import multiprocessing
+import random
+from game2048 import Game2048
+from grid4x4 import Grid4x4
+from tablebase import (PlayerTablebase, Tablebase, build_tablebase,
+                       index_digits, play_within_cap, solve_positions)
+import tablebase as tablebase_module
+import numpy as np
+import pytest
+
+
+def brute_force(cap):
+    """expected score by plain recursion over Game2048 moves"""
+    @lru_cache(maxsize=None)
+    def value(cells):
+        if max(cells) > cap:
+            return 0.0
+        best = 0.0
+        for direction in "LDUR":
+            game = Game2048(Grid4x4(list(cells)))
+            score = game.slide(direction)
+            slid = game.grid._grid
+            if slid == list(cells):
+                # not a legal move
+                continue
+            open_idxs = [i for i, v in enumerate(slid) if v == 0]
+            expected = 0.0
+            if max(slid) <= cap:
+                for i in open_idxs:
+                    for v, prob in ((1, 0.9), (2, 0.1)):
+                        child = list(slid)
+                        child[i] = v
+                        expected += prob * value(tuple(child))
+            best = max(best, score + expected / max(len(open_idxs), 1))
+        return best
+    return value
+
+
+def test_build_matches_brute_force(tmp_path):
+    path = str(tmp_path / "tb1.bin")
+    assert build_tablebase(path, cap=1, processes=2, chunk=1 << 12,
+                           verbose=False)
+    tablebase = Tablebase(path)
+    value = brute_force(1)
+    rng = np.random.default_rng(0)
+    idxs = rng.integers(0, len(tablebase), 300)
+    for grid_vals in index_digits(idxs, 1).tolist():
+        grid = Grid4x4(grid_vals)
+        assert tablebase.lookup(grid) == pytest.approx(value(tuple(grid_vals)),
+                                                       abs=1e-6)
+    tablebase.close()
+
+
+class FakeValues:
+    """stand-in for a cap 2 value array, a fixed value per index"""
+
+    def __getitem__(self, idxs):
+        return (idxs * 2654435761 % 1000) / 1000
+
+
+def test_only_legal_moves():
+    # left column can't slide or merge, only R changes the grid
+    cells = [1, 0, 0, 0, 2, 0, 0, 0, 1, 0, 0, 0, 2, 0, 0, 0]
+    weights = np.array([3 ** i for i in range(16)])
+    values = FakeValues()
+    game = Game2048(Grid4x4(list(cells)))
+    game.slide("R")
+    slid = game.grid._grid
+    open_idxs = [i for i, v in enumerate(slid) if v == 0]
+    expected = 0.0
+    for i in open_idxs:
+        for v, prob in ((1, 0.9), (2, 0.1)):
+            child = np.array(slid)
+            child[i] = v
+            expected += prob * values[child @ weights]
+    # the slide merges nothing, so scores 0
+    expected /= len(open_idxs)
+    idx = np.array([np.array(cells) @ weights])
+    assert solve_positions(idx, values, 2)[0] == pytest.approx(expected)
+
+
+def test_build_spawn(tmp_path, monkeypatch):
+    # workers must not rely on state inherited by fork
+    monkeypatch.setattr(tablebase_module.multiprocessing, 'Pool',
+                        multiprocessing.get_context('spawn').Pool)
+    path = str(tmp_path / "tb1.bin")
+    assert build_tablebase(path, cap=1, processes=2, chunk=1 << 14,
+                           verbose=False)
+    assert not (tmp_path / "tb1.bin.layers").exists()
+    tablebase = Tablebase(path)
+    cells = (1, 1) + (0,) * 14
+    assert tablebase.lookup(Grid4x4(list(cells))) == pytest.approx(
+        brute_force(1)(cells), abs=1e-5)
+    tablebase.close()
+
+
+def test_resume(tmp_path):
+    full = str(tmp_path / "full.bin")
+    build_tablebase(full, cap=1, processes=1, verbose=False)
+    path = str(tmp_path / "resumed.bin")
+    assert not build_tablebase(path, cap=1, processes=1, max_layers=5,
+                               verbose=False)
+    with pytest.raises(ValueError):
+        Tablebase(path)
+    assert build_tablebase(path, cap=1, processes=2, verbose=False)
+    with open(full, 'rb') as a, open(path, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_player_tablebase(tmp_path):
+    path = str(tmp_path / "tb1.bin")
+    build_tablebase(path, cap=1, processes=1, verbose=False)
+    tablebase = Tablebase(path)
+    player = PlayerTablebase(Game2048(rng=random.Random(5)), tablebase)
+    # the player's best move value is the table value of the position
+    rng = np.random.default_rng(1)
+    for grid_vals in index_digits(rng.integers(0, len(tablebase), 50),
+                                  1).tolist():
+        player.game.grid = Grid4x4(grid_vals)
+        values = [player.move_value(d, 1) for d in "LDUR"]
+        best = max((v for v in values if v is not None), default=0.0)
+        assert best == pytest.approx(tablebase.lookup(player.game.grid),
+                                     abs=1e-5)
+        if best > 0:
+            assert values["LDUR".index(player.choose_direction())] == best
+    # and playing from new games scores about the expected value
+    game = Game2048(rng=random.Random(6))
+    starts = []
+    for _ in range(1000):
+        game.reset()
+        starts.append(tablebase.lookup(game.grid))
+    score, seconds = play_within_cap(player, 1, 400)
+    assert abs(score - sum(starts) / len(starts)) < 0.3
@@ -0,0 +1,67 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from batch2048 import BatchGame2048
+from game2048 import Game2048
+from gym_env import Environment3
+from tile_random import TileRandom, TileStreams, spawn_seeds
+import numpy as np
+
+
+def test_tile_random():
+    a = TileRandom(5, block=16)
+    b = TileRandom(5, block=16)
+    values = [a.random() for _ in range(40)]
+    assert values == [b.random() for _ in range(40)]
+    assert all(0.0 <= v < 1.0 for v in values)
+    assert a.choice("LDUR") in "LDUR"
+    sample = a.sample(range(16), 5)
+    assert len(set(sample)) == 5
+
+
+def test_scalar_matches_batch():
+    n = 50
+    seeds = spawn_seeds(3, n)
+    batch = BatchGame2048(n, TileStreams(seeds, block=64))
+    games = [Game2048(rng=TileRandom(seed, block=64)) for seed in seeds]
+    rng = np.random.default_rng(0)
+    active = np.ones(n, dtype=bool)
+    for _ in range(2000):
+        for i, game in enumerate(games):
+            assert game.grid._grid == batch.grids[i].tolist()
+        actions = rng.integers(0, 4, n)
+        batch.slide(actions, active)
+        added = batch.add_tile(active)
+        for i in np.flatnonzero(active):
+            games[i].slide("LDUR"[actions[i]])
+            assert games[i].add_tile() == added[i]
+        active &= added
+        if not active.any():
+            break
+    assert not active.any()
+
+
+def test_environment_rng():
+    first = Environment3(rng=TileRandom(9))
+    second = Environment3(rng=TileRandom(9))
+    for action in [0, 1, 2, 3] * 10:
+        assert first.step(action)[:3] == second.step(action)[:3]
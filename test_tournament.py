@@ -0,0 +1,72 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from tournament import (SPRT, ConfidenceStop, compare_players,
+                        metric_function, play_game)
+import math
+
+
+def test_metric_function():
+    assert metric_function('max_tile')((100, 11)) == 11.0
+    assert metric_function('iterations')((100, 11)) == 100.0
+    assert metric_function('reach_2048')((100, 11)) == 1.0
+    assert metric_function('reach_2048')((100, 10)) == 0.0
+
+
+def test_play_game_seeded():
+    assert play_game('random', 5, 1200) == play_game('random', 5, 1200)
+
+
+def test_sprt():
+    test = SPRT(alpha=0.05, delta=0.1)
+    for _ in range(7):
+        test.update(2.0, 1.0)
+    test.update(1.0, 1.0)
+    assert test.decision() is None
+    test.update(2.0, 1.0)
+    assert test.decision() == 'A'
+    for _ in range(16):
+        test.update(1.0, 2.0)
+    assert test.decision() == 'B'
+
+
+def test_confidence_stop():
+    test = ConfidenceStop(alpha=0.05, max_pairs=1000, check_every=10)
+    assert test.summary() == "no pairs"
+    test.update(1.0, 0.0)
+    assert test.interval() == (-math.inf, math.inf)
+    test.summary()
+    for i in range(18):
+        test.update(1.0 + i % 2, 0.0)
+    assert test.decision() is None
+    test.update(1.0, 0.0)
+    assert test.decision() == 'A'
+
+
+def test_compare_players():
+    decision, test, pairs = compare_players(
+        'corner', 'random', max_games=200, processes=2, verbose=False)
+    assert decision == 'corner'
+    assert len(pairs) < 200
+    # decision only depends on seed
+    assert compare_players('corner', 'random', max_games=200, processes=3,
+                           verbose=False)[2] == pairs
@@ -0,0 +1,92 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from grid4x4 import Grid4x4
+from grid_batch import canonical_packed
+from gym_env import Environment3
+from visit_counter import NoveltyBonus, VisitCounter
+import math
+import numpy as np
+import random
+
+
+def test_counts_never_under_estimate():
+    counter = VisitCounter(width=1 << 8, depth=4)
+    rng = np.random.default_rng(0)
+    packed = rng.integers(0, 1 << 63, 2000, dtype=np.uint64).tolist()
+    visits = {}
+    for p in packed[:1000] + packed[:500]:
+        visits[p] = visits.get(p, 0) + 1
+        assert counter.add(p) >= visits[p]
+    assert all(counter.count(p) >= n for p, n in visits.items())
+    assert counter.nbytes == 4 * 4 * (1 << 8)
+
+
+def test_add_batch_matches_add():
+    scalar = VisitCounter(width=1 << 10, seed=3)
+    batch = VisitCounter(width=1 << 10, seed=3)
+    packed = np.random.default_rng(1).integers(0, 1 << 63, 800,
+                                               dtype=np.uint64)
+    packed = np.concatenate([packed, packed[:200]])
+    for p in packed.tolist():
+        scalar.add(p)
+    counts = batch.add_batch(packed)
+    assert scalar.table == batch.table
+    assert counts.tolist() == [scalar.count(p) for p in packed.tolist()]
+
+
+def test_novelty_bonus():
+    bonus = NoveltyBonus(scale=2.0)
+    grid = Grid4x4("""
+                   1...
+                   2...
+                   ....
+                   ...3
+                   """)
+    assert bonus(grid) == 2.0
+    # flips share a count
+    assert bonus(grid.flip(True, False, True)) == 2.0 / math.sqrt(2)
+    grids = np.array([grid._grid, grid.flip(False, True, False)._grid])
+    assert np.allclose(bonus.batch(grids), 2.0 / np.sqrt([4, 4]))
+
+
+def test_canonical_packed():
+    grids = np.random.default_rng(2).integers(0, 12, (100, 16),
+                                              dtype=np.uint8)
+    for grid_vals, packed in zip(grids, canonical_packed(grids)):
+        grid = Grid4x4()
+        grid._grid = grid_vals.tolist()
+        assert grid.canonical()[0] == packed
+
+
+def test_environment_novelty():
+    # each environment has its own rng, the global random module is
+    # left alone
+    env = Environment3(rng=random.Random(1))
+    plain = Environment3(rng=random.Random(2))
+    env.novelty = NoveltyBonus(scale=0.5)
+    env.game.grid = Grid4x4(plain.game.grid)
+    env.game.random.seed(0)
+    _, reward, _, _, _ = env.step(0)
+    plain.game.random.seed(0)
+    _, plain_reward, _, _, _ = plain.step(0)
+    assert reward == plain_reward + 0.5
@@ -0,0 +1,106 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from typing import List, Sequence
+
+
+def spawn_seeds(seed: int, n: int) -> List[np.random.SeedSequence]:
+    """
+    n independent seeds from seed, e.g. one per game or per worker process,
+    the same seed always gives the same streams
+    """
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+class TileRandom:
+    """
+    Stand-in for the random module as Game2048.random (see Game2048 rng),
+    backed by a numpy Generator.  Uniform values are drawn a block at a
+    time and handed out one by one.
+
+    Game2048.reset() and add_tile() take two values per tile, the same as
+    game n of BatchGame2048 with TileStreams of the same seeds, so scalar
+    and batched games can be compared move by move.
+    """
+
+    def __init__(self, seed=None, block: int = 1024):
+        self.generator = np.random.default_rng(seed)
+        self.block = block
+        self._values: List[float] = []
+        self._pos = 0
+
+    def seed(self, seed=None):
+        """start a new stream, like random.seed()"""
+        self.generator = np.random.default_rng(seed)
+        self._values = []
+        self._pos = 0
+
+    def random(self) -> float:
+        if self._pos == len(self._values):
+            self._values = self.generator.random(self.block).tolist()
+            self._pos = 0
+        value = self._values[self._pos]
+        self._pos += 1
+        return value
+
+    def choice(self, seq: Sequence):
+        return seq[int(self.random() * len(seq))]
+
+    def sample(self, population: Sequence, k: int) -> list:
+        # partial Fisher-Yates shuffle, one value per element
+        pool = list(population)
+        for i in range(k):
+            j = i + int(self.random() * (len(pool) - i))
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:k]
+
+
+class TileStreams:
+    """
+    One TileRandom stream per game for BatchGame2048.  Each stream is
+    refilled block at a time from its own Generator, so drawing for N
+    games is a couple of array lookups.
+    """
+
+    def __init__(self, seeds: Sequence, block: int = 1024):
+        if block % 2 != 0:
+            raise ValueError("block must be even, tiles take two values")
+        self.generators = [np.random.default_rng(seed) for seed in seeds]
+        self.block = block
+        self.values = np.empty((len(seeds), block))
+        # position in values of each stream, block means empty
+        self.pos = np.full(len(seeds), block, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.generators)
+
+    def pairs(self, idxs: np.ndarray):
+        """next two values of streams idxs, as (first, second) arrays"""
+        for i in idxs[self.pos[idxs] == self.block].tolist():
+            self.values[i] = self.generators[i].random(self.block)
+            self.pos[i] = 0
+        pos = self.pos[idxs]
+        first = self.values[idxs, pos]
+        second = self.values[idxs, pos + 1]
+        self.pos[idxs] = pos + 2
+        return first, second
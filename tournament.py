@@ -0,0 +1,200 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import multiprocessing
+import random
+import statistics
+from game2048 import Game2048
+from typing import Callable, List, Optional, Tuple
+
+# (iteration, max value) as returned by the players run() methods
+GameResult = Tuple[int, int]
+
+
+def metric_function(metric: str) -> Callable[[GameResult], float]:
+    """
+    metric of a game result by name : 'max_tile' (log2 of max tile),
+    'iterations', or 'reach_N' (1.0 if a tile of at least N was made)
+    """
+    if metric == 'max_tile':
+        return lambda result: float(result[1])
+    if metric == 'iterations':
+        return lambda result: float(result[0])
+    if metric.startswith('reach_'):
+        target = int(metric[len('reach_'):])
+        return lambda result: float((1 << result[1]) >= target)
+    raise ValueError(f"unknown metric {metric}")
+
+
+def play_game(name: str, seed: int, max_iterations: int) -> GameResult:
+    """
+    one game of a players.PLAYERS player, seed fixes both the new tiles
+    and any random choices of the player
+    """
+    from players import PLAYERS
+    game = Game2048()
+    # tiles get their own stream so they don't depend on player decisions
+    game.random = random.Random(seed)
+    random.seed(seed)
+    return PLAYERS[name](game).run(max_iterations)
+
+
+def _play_pair(args) -> Tuple[GameResult, GameResult]:
+    name_a, name_b, seed, max_iterations = args
+    return (play_game(name_a, seed, max_iterations),
+            play_game(name_b, seed, max_iterations))
+
+
+class SPRT:
+    """
+    Sequential probability ratio test on paired games.  Pairs where the
+    metric differs are wins for A or B, ties are ignored.  Tests
+    p(A wins) = 0.5 + delta against p(A wins) = 0.5 - delta, with error
+    rate alpha for either wrong decision.  Players closer than delta may
+    be decided either way.
+    """
+
+    def __init__(self, alpha: float = 0.05, delta: float = 0.1):
+        self.upper = math.log((1 - alpha) / alpha)
+        self.lower = -self.upper
+        self.win_llr = math.log((0.5 + delta) / (0.5 - delta))
+        self.wins = 0
+        self.losses = 0
+
+    def update(self, a: float, b: float):
+        if a > b:
+            self.wins += 1
+        elif a < b:
+            self.losses += 1
+
+    def llr(self) -> float:
+        return (self.wins - self.losses) * self.win_llr
+
+    def decision(self) -> Optional[str]:
+        """'A' or 'B' once one player is better, else None"""
+        llr = self.llr()
+        if llr >= self.upper:
+            return 'A'
+        if llr <= self.lower:
+            return 'B'
+        return None
+
+    def summary(self) -> str:
+        return (f"wins {self.wins} losses {self.losses} "
+                f"llr {self.llr():.2f} bounds ({self.lower:.2f}, "
+                f"{self.upper:.2f})")
+
+
+class ConfidenceStop:
+    """
+    Stops when a normal confidence interval of the mean paired difference
+    (A - B) excludes zero.  The interval is only checked every check_every
+    pairs and alpha is split evenly over the max_pairs / check_every
+    looks (Bonferroni), so repeated looks don't inflate the error rate.
+    """
+
+    def __init__(self, alpha: float = 0.05, max_pairs: int = 10000,
+                 check_every: int = 50, min_pairs: int = 20):
+        looks = max(1, max_pairs // check_every)
+        self.z = statistics.NormalDist().inv_cdf(1 - alpha / (2 * looks))
+        self.check_every = check_every
+        self.min_pairs = min_pairs
+        self.diffs: List[float] = []
+
+    def update(self, a: float, b: float):
+        self.diffs.append(a - b)
+
+    def interval(self) -> Tuple[float, float]:
+        n = len(self.diffs)
+        if n < 2:
+            return (-math.inf, math.inf)
+        mean = statistics.fmean(self.diffs)
+        half = self.z * statistics.stdev(self.diffs) / math.sqrt(n)
+        return (mean - half, mean + half)
+
+    def decision(self) -> Optional[str]:
+        n = len(self.diffs)
+        if n < self.min_pairs or n % self.check_every != 0:
+            return None
+        low, high = self.interval()
+        if low > 0:
+            return 'A'
+        if high < 0:
+            return 'B'
+        return None
+
+    def summary(self) -> str:
+        if len(self.diffs) == 0:
+            return "no pairs"
+        low, high = self.interval()
+        return (f"mean diff {statistics.fmean(self.diffs):.3f} "
+                f"interval ({low:.3f}, {high:.3f})")
+
+
+def compare_players(name_a: str, name_b: str, metric: str = 'max_tile',
+                    method: str = 'sprt', alpha: float = 0.05,
+                    delta: float = 0.1, max_games: int = 10000,
+                    processes: int = 4, max_iterations: int = 1200,
+                    seed: int = 0, verbose: bool = True):
+    """
+    Plays pairs of games with the same seed for both players, in parallel,
+    until the test decides which player is better on metric or max_games
+    pairs have been played.  Results are consumed in seed order so the
+    outcome only depends on seed, not on processes.
+    Returns (decision, test, pairs) where decision is name_a, name_b, or
+    None and pairs is a list of (result_a, result_b) game results.
+    """
+    value = metric_function(metric)
+    if method == 'sprt':
+        test = SPRT(alpha, delta)
+    elif method == 'ci':
+        test = ConfidenceStop(alpha, max_games)
+    else:
+        raise ValueError(f"unknown method {method}")
+    pairs: List[Tuple[GameResult, GameResult]] = []
+    decision = None
+    tasks = ((name_a, name_b, seed + i, max_iterations)
+             for i in range(max_games))
+    with multiprocessing.Pool(processes) as pool:
+        # leaving the with block terminates games still queued or running
+        for result_a, result_b in pool.imap(_play_pair, tasks):
+            pairs.append((result_a, result_b))
+            test.update(value(result_a), value(result_b))
+            decision = test.decision()
+            if verbose and len(pairs) % 100 == 0:
+                print(f"pairs {len(pairs)} : {test.summary()}")
+            if decision is not None:
+                break
+    if decision is not None:
+        decision = name_a if decision == 'A' else name_b
+    return (decision, test, pairs)
+
+
+def print_comparison(name_a: str, name_b: str, metric: str, decision, test,
+                     pairs):
+    print("-"*80)
+    print(f"{name_a} vs {name_b} on {metric} : {test.summary()}")
+    if decision is None:
+        print(f"undecided after {len(pairs)} pairs")
+    else:
+        print(f"{decision} is better, decided after {len(pairs)} pairs")
@@ -0,0 +1,119 @@
+# MIT License
+
+# Copyright (c) 2023 Derek King
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import random
+from array import array
+from grid4x4 import Grid4x4
+
+_MASK64 = (1 << 64) - 1
+
+
+class VisitCounter:
+    """
+    Approximate visit counts of packed grids in fixed memory (count-min
+    sketch).  Each of depth rows hashes the grid to one of width counters,
+    the estimate is the smallest of its counters, so counts are never
+    under-estimated and over-estimate only through hash collisions.
+    Memory is depth * width * 4 bytes however many grids are seen.
+    """
+
+    def __init__(self, width: int = 1 << 18, depth: int = 4, seed: int = 0):
+        if width & (width - 1):
+            raise ValueError("width must be a power of 2")
+        self.width = width
+        self.depth = depth
+        self.shift = 64 - width.bit_length() + 1
+        rng = random.Random(seed)
+        # multiply-shift hash, one odd multiplier per row
+        self.multipliers = [rng.getrandbits(64) | 1 for _ in range(depth)]
+        self.offsets = [row * width for row in range(depth)]
+        self.table = array('I', bytes(4 * depth * width))
+        self.total = 0
+
+    def _indexes(self, packed: int):
+        return [offset + (((packed * a) & _MASK64) >> self.shift)
+                for a, offset in zip(self.multipliers, self.offsets)]
+
+    def count(self, packed: int) -> int:
+        table = self.table
+        return min(table[i] for i in self._indexes(packed))
+
+    def add(self, packed: int) -> int:
+        """count a visit of packed, returns estimated count including it"""
+        table = self.table
+        self.total += 1
+        count = 0xFFFFFFFF
+        for i in self._indexes(packed):
+            # counters saturate instead of overflowing
+            value = min(table[i] + 1, 0xFFFFFFFF)
+            table[i] = value
+            count = min(count, value)
+        return count
+
+    def add_batch(self, packed):
+        """
+        add() for a numpy array of packed grids, returned counts include
+        every visit in the batch
+        """
+        import numpy as np
+        packed = np.asarray(packed, dtype=np.uint64)
+        # same memory as self.table, no copy
+        table = np.frombuffer(self.table, dtype=np.uint32)
+        idxs = np.stack([
+            (packed * np.uint64(a)) >> np.uint64(self.shift)
+            for a in self.multipliers]).astype(np.intp)
+        idxs += np.array(self.offsets, dtype=np.intp)[:, None]
+        cells, inverse, visits = np.unique(idxs, return_inverse=True,
+                                           return_counts=True)
+        values = np.minimum(table[cells].astype(np.uint64) + visits,
+                            np.uint64(0xFFFFFFFF))
+        table[cells] = values
+        self.total += len(packed)
+        return values[inverse.reshape(idxs.shape)].min(axis=0)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.itemsize * len(self.table)
+
+
+class NoveltyBonus:
+    """
+    Count-based exploration bonus scale / sqrt(visits) of the canonical
+    grid (see Grid4x4.canonical), so boards that are flips of each other
+    share a count.  The bonus of a board decays as it is visited again.
+    """
+
+    def __init__(self, scale: float = 1.0, counter: VisitCounter = None):
+        self.scale = scale
+        self.counter = VisitCounter() if counter is None else counter
+
+    def __call__(self, grid: Grid4x4) -> float:
+        packed, _ = grid.canonical()
+        return self.scale / math.sqrt(self.counter.add(packed))
+
+    def batch(self, grids):
+        """bonus for (N,16) array of cell values, numpy array of N"""
+        import numpy as np
+        from grid_batch import canonical_packed
+        counts = self.counter.add_batch(canonical_packed(grids))
+        return self.scale / np.sqrt(counts.astype(np.float64))